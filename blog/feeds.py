@@ -0,0 +1,175 @@
+"""RSS and Atom feeds of the latest blog posts.
+
+Feeds are built from a projection of the newest ``BLOG_FEED_ITEMS`` posts:
+the IDs come from blog.taxonomy, and then one values() query, one query
+for authors and one URL index lookup. The rendered XML is cached under the
+``blog_listing`` tag, which blog.signals bumps whenever a post is
+published or unpublished, and the URL index tag, bumped when pages move. Responses carry an ETag and a Last-Modified date
+(when that version of the feed was rendered), so polling aggregators mostly
+get 304s.
+
+With ``BLOG_FEED_STATIC_ROOT`` set, feeds are also written there as
+``<listing path>/feed/<kind>/index.xml`` (and per category) on every
+publish, for the web server to serve directly.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+
+from core.cache import versioned_key
+from core.page_urls import INDEX_TAG, resolve_full_urls
+from mysite.db_routers import use_primary
+
+from .taxonomy import get_index as get_taxonomy
+
+FEED_TYPES = {"rss": Rss201rev2Feed, "atom": Atom1Feed}
+
+
+def feed_items(entries):
+    """Projection of the posts in ``entries``, in that order."""
+    # blog.models serves these feeds.
+    from .models import BlogAuthorsOrderable, BlogDetailPage
+
+    ids = [pk for _, pk in entries[: getattr(settings, "BLOG_FEED_ITEMS", 20)]]
+    rows = {
+        row["pk"]: row
+        for row in BlogDetailPage.objects.live().public().filter(pk__in=ids).values(
+            "pk", "title", "custom_title", "search_description",
+            "first_published_at", "last_published_at",
+        )
+    }
+    authors = defaultdict(list)
+    for page_id, name in (
+        BlogAuthorsOrderable.objects.filter(page_id__in=ids)
+        .order_by("sort_order")
+        .values_list("page_id", "author__name")
+    ):
+        authors[page_id].append(name)
+    urls = resolve_full_urls(ids)
+    return [
+        {**rows[pk], "url": urls[pk], "authors": authors[pk]}
+        for pk in ids
+        if pk in rows and urls[pk]
+    ]
+
+
+def render_feed(listing_page, kind, category=None):
+    """Return ``{"content", "content_type", "etag"}``."""
+    taxonomy = get_taxonomy()
+    link = resolve_full_urls([listing_page.pk])[listing_page.pk] or ""
+    title = listing_page.custom_title or listing_page.title
+    if category is not None:
+        term = taxonomy.category(category)
+        if term is None:
+            raise Http404("No such category")
+        link += listing_page.reverse_subpage("category_view", kwargs={"cat_slug": category})
+        title = f"{title}: {term.name}"
+
+    feed = FEED_TYPES[kind](
+        title=title,
+        link=link,
+        description=listing_page.search_description or title,
+        language=settings.LANGUAGE_CODE,
+    )
+    items = feed_items(taxonomy.entries(category=category))
+    for item in items:
+        feed.add_item(
+            title=item["custom_title"] or item["title"],
+            link=item["url"],
+            description=item["search_description"],
+            unique_id=item["url"],
+            pubdate=item["first_published_at"],
+            updateddate=item["last_published_at"],
+            author_name=", ".join(item["authors"]) or None,
+        )
+    content = feed.writeString("utf-8").encode()
+    return {
+        "content": content,
+        "content_type": feed.content_type,
+        "etag": f'"{hashlib.md5(content).hexdigest()}"',
+    }
+
+
+def get_feed(listing_page, kind, category=None):
+    """The cached feed, rendered again after the next publish."""
+    parts = (listing_page.pk, kind, category or "")
+    key = versioned_key("blog_feed", ["blog_listing", INDEX_TAG], *parts)
+
+    def build():
+        feed = render_feed(listing_page, kind, category)
+        # Not the newest post's date: that goes back when the newest post is
+        # unpublished, and If-Modified-Since would keep getting 304s. Each
+        # render is at least a second after the last one, so a feed rendered
+        # again within the same second is still newer.
+        modified_key = "blog_feed_modified:" + ":".join(map(str, parts))
+        feed["last_modified"] = max(int(time.time()), (cache.get(modified_key) or 0) + 1)
+        cache.set(modified_key, feed["last_modified"], None)
+        return feed
+
+    with use_primary():
+        return cache.get_or_set(key, build, getattr(settings, "BLOG_FEED_TIMEOUT", 60 * 60 * 24))
+
+
+def feed_response(request, feed):
+    response = get_conditional_response(
+        request, etag=feed["etag"], last_modified=feed["last_modified"]
+    )
+    if response is None:
+        response = HttpResponse(feed["content"], content_type=feed["content_type"])
+    response["ETag"] = feed["etag"]
+    if feed["last_modified"]:
+        response["Last-Modified"] = http_date(feed["last_modified"])
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Readers see either the old file or the new one, never a partial write.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(content)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def write_static_feeds(listing_page, root=None):
+    """Write every feed of ``listing_page`` under ``root``; return the paths."""
+    root = root or getattr(settings, "BLOG_FEED_STATIC_ROOT", None)
+    if not root:
+        return []
+    listing_url = resolve_full_urls([listing_page.pk])[listing_page.pk]
+    if not listing_url:
+        return []
+    base = urlsplit(listing_url).path.strip("/")
+    feeds = [(None, "")] + [
+        (term.slug, f"category/{term.slug}/") for term in get_taxonomy().category_terms()
+    ]
+    paths = []
+    for category, prefix in feeds:
+        for kind in FEED_TYPES:
+            path = os.path.join(root, base, prefix, "feed", kind, "index.xml")
+            _write(path, get_feed(listing_page, kind, category)["content"])
+            paths.append(path)
+    return paths
+
+
+def write_all_static_feeds(root=None):
+    """Write the feeds of every live blog listing page; return the paths."""
+    from .models import BlogListingPage
+
+    return [
+        path
+        for listing_page in BlogListingPage.objects.live()
+        for path in write_static_feeds(listing_page, root)
+    ]
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from blog.related import ENTRY_TIMEOUT, entry_key, get_model, pack
+from mysite.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the related posts of every live blog post from shared tags, "
+        "categories and authors, and store them in the cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Entries stored per batch.")
+
+    @use_primary()
+    def handle(self, *args, chunk_size, **options):
+        start = time.perf_counter()
+        model = get_model()
+        features = model.features_by_post()
+        post_ids = list(model.rank)
+        timeout = getattr(settings, "RELATED_POSTS_TIMEOUT", ENTRY_TIMEOUT)
+
+        total = 0
+        for offset in range(0, len(post_ids), chunk_size):
+            chunk = post_ids[offset:offset + chunk_size]
+            cache.set_many(
+                {
+                    entry_key(pk): pack(model.top(model.scores(pk, features.get(pk, ()))))
+                    for pk in chunk
+                },
+                timeout,
+            )
+            total += len(chunk)
+            rate = total / max(time.perf_counter() - start, 0.001)
+            self.stdout.write(f"\r{total}/{len(post_ids)} posts, {rate:.0f}/s", ending="")
+
+        self.stdout.write("")
+        self.stdout.write(
+            self.style.SUCCESS(f"Computed related posts of {total} posts in {time.perf_counter() - start:.1f}s.")
+        )
@@ -0,0 +1,57 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from blog.models import BlogDetailPage
+from blog.transfer import post_to_record, resolve_images
+from mysite.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Write blog posts as newline-delimited JSON, one chunk of posts in "
+        "memory at a time. Posts are written in ID order; pass --after-id with "
+        "the last exported ID (and --append) to resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write, or - for stdout.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Posts per batch.")
+        parser.add_argument("--after-id", type=int, default=0, help="Only export posts with a higher ID.")
+        parser.add_argument("--append", action="store_true", help="Append to the output file.")
+
+    @use_primary()
+    def handle(self, *args, output, chunk_size, after_id, append, **options):
+        out = sys.stdout if output == "-" else open(output, "a" if append else "w", encoding="utf-8")
+        start = time.perf_counter()
+        total = 0
+        last_pk = after_id
+        try:
+            while True:
+                chunk = list(
+                    BlogDetailPage.objects.filter(pk__gt=last_pk).order_by("pk").for_listing()[:chunk_size]
+                )
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+                for record in resolve_images([post_to_record(post) for post in chunk]):
+                    out.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False))
+                    out.write("\n")
+                out.flush()
+                total += len(chunk)
+                self.progress(total, start, last_pk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f"Exported {total} posts in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} posts/s)."
+        )
+
+    def progress(self, total, start, last_pk):
+        rate = total / max(time.perf_counter() - start, 0.001)
+        self.stderr.write(f"{total} posts, {rate:.0f}/s, last id {last_pk}")
@@ -0,0 +1,72 @@
+import json
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.models import BlogListingPage
+from blog.transfer import RecordLoader
+from core.page_tree import bulk_add_children
+from mysite.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Create blog posts from a newline-delimited JSON export under the blog "
+        "listing page. Posts whose slug already exists there are skipped, so an "
+        "interrupted import can simply be run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="File written by export_blog_posts.")
+        parser.add_argument("--parent", type=int, help="ID of the parent page (default: the blog listing page).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Posts per transaction.")
+
+    @use_primary()
+    def handle(self, *args, input, parent, chunk_size, **options):
+        parent_page = (
+            BlogListingPage.objects.filter(pk=parent).first() if parent else BlogListingPage.objects.first()
+        )
+        if parent_page is None:
+            raise CommandError("No blog listing page to import into.")
+
+        loader = RecordLoader()
+        start = time.perf_counter()
+        created = skipped = 0
+        with open(input, encoding="utf-8") as lines:
+            records = (json.loads(line) for line in lines if line.strip())
+            while chunk := list(islice(records, chunk_size)):
+                new, existing = self.import_chunk(parent_page, loader, chunk)
+                created += new
+                skipped += existing
+                self.report_missing_images(loader)
+                rate = created / max(time.perf_counter() - start, 0.001)
+                self.stderr.write(f"{created} created, {skipped} skipped, {rate:.0f} posts/s")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {created} posts ({skipped} already present) in {elapsed:.1f}s "
+                f"({created / max(elapsed, 0.001):.0f} posts/s)."
+            )
+        )
+
+    def report_missing_images(self, loader):
+        for slug, pk, file in loader.missing_images:
+            self.stderr.write(
+                self.style.WARNING(f"{slug}: dropped image {pk} ({file or 'no file'}), not found")
+            )
+        loader.missing_images.clear()
+
+    @transaction.atomic
+    def import_chunk(self, parent_page, loader, records):
+        existing = set(
+            parent_page.get_children()
+            .filter(slug__in=[record["slug"] for record in records])
+            .values_list("slug", flat=True)
+        )
+        records = [record for record in records if record["slug"] not in existing]
+        loader.load_related(records)
+        bulk_add_children(parent_page, [loader.build(record) for record in records])
+        return len(records), len(existing)
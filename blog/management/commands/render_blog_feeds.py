@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.feeds import write_all_static_feeds
+from mysite.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the RSS and Atom feeds of the blog (overall and per category) "
+        "as static files, as is done on every publish when "
+        "BLOG_FEED_STATIC_ROOT is set."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--root", help="Directory to write to (default: BLOG_FEED_STATIC_ROOT).")
+
+    @use_primary()
+    def handle(self, *args, root, **options):
+        root = root or getattr(settings, "BLOG_FEED_STATIC_ROOT", None)
+        if not root:
+            raise CommandError("Pass --root or set BLOG_FEED_STATIC_ROOT.")
+        paths = write_all_static_feeds(root)
+        for path in paths:
+            self.stdout.write(path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(paths)} feeds."))
@@ -2,28 +2,52 @@ from django.db import models
 from django import forms
 from modelcluster.fields import ParentalKey, ParentalManyToManyField
 from modelcluster.contrib.taggit import ClusterTaggableManager
+from taggit.models import TaggedItemBase
 from rest_framework.fields import Field
 from wagtail.api import APIField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, InlinePanel
 from wagtail.fields import StreamField
 from wagtail.models import Page, Orderable
+from wagtail.search import index
 from wagtail.contrib.routable_page.models import RoutablePageMixin, route
+from wagtail.images import get_image_model
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.snippets.models import register_snippet
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.core.cache import cache  # Import for cache handling
+from django.conf import settings
+from django.shortcuts import render
+
+from core.images import get_rendition_set_data, rendition_set_specs
+from core.page_urls import resolve_urls
+from streams.api import CachedStreamField
+from streams.prefetch import StreamPrefetchMixin, collect_references
+from streams.search import SearchDocumentMixin
+from .feeds import feed_response, get_feed
+from .pagination import IndexedKeysetPaginator, InvalidCursor
+from .querysets import BlogDetailPageManager, LISTING_RENDITION_SPECS, prepare_for_listing
+from .related import get_related_posts
+from .taxonomy import get_index as get_taxonomy
 
 # Custom Fields
 class ImageSerializedField(Field):
-    """A custom serializer used in Wagtail's API."""
-    
+    """A custom serializer used in Wagtail's API.
+
+    Pass ``rendition_set`` to include a responsive set from core.images.
+    """
+
+    def __init__(self, rendition_set=None, **kwargs):
+        self.rendition_set = rendition_set
+        super().__init__(**kwargs)
+
     def to_representation(self, value):
-        return {
+        data = {
             "url": value.file.url,
             "title": value.title,
             "width": value.width,
             "height": value.height,
         }
+        if self.rendition_set:
+            data["renditions"] = get_rendition_set_data(value, self.rendition_set)
+        return data
 
 # Custom Block
 from wagtail import blocks
@@ -92,14 +116,41 @@ register_snippet(BlogCategory)
 # Blog Models
 class BlogChildPagesSerializer(Field):
     """Serializer for blog child pages."""
-    def to_representation(self, child_pages):
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, page):
+        # core.api.SitePagesAPIViewSet loads the children of every page in
+        # the response at once.
+        batch = self.context.get('page_batch')
+        if batch is not None:
+            child_pages = batch.get_children(page)
+            urls = batch.child_urls
+        else:
+            child_pages = list(page.get_child_pages)
+            urls = resolve_urls([child.pk for child in child_pages], self.context.get('request'))
         return [{
             'id': child.id,
             'title': child.title,
             'slug': child.slug,
-            'url': child.url,
+            'url': urls[child.pk],
         } for child in child_pages]
 
+class RelatedPostsSerializer(Field):
+    """Serializer for the precomputed related posts of a blog post."""
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, page):
+        posts = get_related_posts(page)
+        urls = resolve_urls([post.pk for post in posts], self.context.get('request'))
+        return [{
+            'id': post.id,
+            'title': post.title,
+            'custom_title': post.custom_title,
+            'url': urls[post.pk],
+        } for post in posts]
+
 class BlogListingPage(RoutablePageMixin, Page):
     """Page listing all blog posts."""
     template = "blog/blog_listing_page.html"
@@ -112,10 +163,17 @@ class BlogListingPage(RoutablePageMixin, Page):
         FieldPanel("custom_title"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("custom_title", boost=2),
+    ]
+
     api_fields = [
-        APIField("posts", serializer=BlogChildPagesSerializer(source='get_child_pages')),
+        APIField("posts", serializer=BlogChildPagesSerializer()),
     ]
 
+    # Extra tags for core.middleware.PageCacheMiddleware; bumped by blog.signals.
+    page_cache_tags = ["blog_listing"]
+
     @property
     def get_child_pages(self):
         return self.get_children().public().live()
@@ -123,38 +181,55 @@ class BlogListingPage(RoutablePageMixin, Page):
     def get_context(self, request, *args, **kwargs):
         """Custom context for the blog listing page."""
         context = super().get_context(request, *args, **kwargs)
-        posts = BlogDetailPage.objects.live().public().order_by('-first_published_at')
-
-        if request.GET.get('tag', None):
-            tag = request.GET['tag']
-            posts = posts.filter(tags__slug=tag)
+        taxonomy = get_taxonomy()
+        context['posts'] = self.paginate_posts(
+            request, taxonomy.entries(tag=request.GET.get('tag') or None)
+        )
+        context['tag'] = request.GET.get('tag', '')
+
+        context['categories'] = taxonomy.category_terms()
+        context['tag_cloud'] = taxonomy.tag_terms(getattr(settings, "BLOG_TAG_CLOUD_SIZE", 30))
+        return context
 
-        paginator = Paginator(posts, 2)
-        page = request.GET.get("page")
+    def paginate_posts(self, request, entries):
+        """The page of ``entries`` picked by ``?after=``/``?before=``, ready to list."""
+        paginator = IndexedKeysetPaginator(
+            entries,
+            BlogDetailPage.objects.live().public().for_listing(),
+            getattr(settings, "BLOG_POSTS_PER_PAGE", 2),
+        )
         try:
-            context['posts'] = paginator.page(page)
-        except PageNotAnInteger:
-            context['posts'] = paginator.page(1)
-        except EmptyPage:
-            context['posts'] = paginator.page(paginator.num_pages)
-
-        context['categories'] = BlogCategory.objects.all()
-        return context
+            posts = paginator.page(
+                after=request.GET.get("after"),
+                before=request.GET.get("before"),
+            )
+        except InvalidCursor:
+            posts = paginator.page()
+        posts.object_list = prepare_for_listing(posts.object_list, request)
+        return posts
+
+    @route(r"^feed/(?P<kind>rss|atom)/$", name="feed")
+    def feed(self, request, kind):
+        """RSS or Atom feed of the latest posts."""
+        return feed_response(request, get_feed(self, kind))
+
+    @route(r"^category/(?P<cat_slug>[-\w]+)/feed/(?P<kind>rss|atom)/$", name="category_feed")
+    def category_feed(self, request, cat_slug, kind):
+        """RSS or Atom feed of the latest posts in a category."""
+        return feed_response(request, get_feed(self, kind, cat_slug))
 
     @route(r"^category/(?P<cat_slug>[-\w]+)/$", name="category_view")
     def category_view(self, request, cat_slug):
         """View blog posts by category."""
         context = self.get_context(request)
 
-        try:
-            category = BlogCategory.objects.get(slug=cat_slug)
-        except BlogCategory.DoesNotExist:
-            category = None
-
+        taxonomy = get_taxonomy()
+        category = taxonomy.category(cat_slug)
         if category:
-            context['posts'] = BlogDetailPage.objects.live().public().filter(categories=category)
+            context['posts'] = self.paginate_posts(request, taxonomy.entries(category=cat_slug))
         else:
             context['posts'] = BlogDetailPage.objects.none()
+        context['category'] = category
 
         return render(request, "blog/latest_posts.html", context)
 
@@ -168,12 +243,14 @@ class BlogListingPage(RoutablePageMixin, Page):
         })
         return sitemap
 
-class BlogDetailPage(Page):
+class BlogDetailPage(SearchDocumentMixin, StreamPrefetchMixin, Page):
     """Detail page for a blog post."""
     subpage_types = []
     parent_page_types = ['blog.BlogListingPage']
     tags = ClusterTaggableManager(through='blog.BlogPageTag', blank=True)
 
+    objects = BlogDetailPageManager()
+
     custom_title = models.CharField(max_length=100)
     categories = ParentalManyToManyField("blog.BlogCategory", blank=True)
 
@@ -195,16 +272,65 @@ class BlogDetailPage(Page):
         FieldPanel("content"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("custom_title", boost=2),
+        index.SearchField("search_document"),
+        index.RelatedFields("tags", [index.SearchField("name", boost=1.5)]),
+    ]
+
     api_fields = [
         APIField("tags"),
-        APIField("content"),
+        APIField("content", serializer=CachedStreamField()),
+        APIField("banner", serializer=ImageSerializedField(rendition_set="blog_banner")),
+        APIField("related_posts", serializer=RelatedPostsSerializer()),
     ]
 
-    def save(self, *args, **kwargs):
-        """Custom save method to clear cache for blog preview."""
-        key = f"blog_post_preview_{self.id}"  # Custom cache key
-        cache.delete(key)
-        super().save(*args, **kwargs)
+    prefetch_stream_fields = ["banner_image", "content"]
+    search_stream_fields = ["content"]
+    prefetch_rendition_specs = rendition_set_specs("blog_banner")
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        context['related_posts'] = prepare_for_listing(get_related_posts(self), request)
+        return context
+
+    @property
+    def banner(self):
+        """The first image of ``banner_image``, if any."""
+        if self.banner_image:
+            return self.banner_image[0].value
+        return None
+
+    def get_rendition_requests(self):
+        yield from super().get_rendition_requests()
+        for image_id in collect_references([self.banner_image])[get_image_model()]:
+            for spec in LISTING_RENDITION_SPECS:
+                yield image_id, spec
+        for item in self.blog_authors.select_related("author"):
+            if item.author.image_id:
+                yield item.author.image_id, "fill-50x50"
+
+
+class BlogAuthorsOrderable(Orderable):
+    """Select one or more blog authors from the snippet."""
+    page = ParentalKey("blog.BlogDetailPage", related_name="blog_authors")
+    author = models.ForeignKey(
+        "blog.BlogAuthor",
+        on_delete=models.CASCADE,
+    )
+
+    panels = [
+        FieldPanel("author"),
+    ]
+
+
+class BlogPageTag(TaggedItemBase):
+    """Tags attached to blog posts."""
+    content_object = ParentalKey(
+        "blog.BlogDetailPage",
+        related_name="tagged_items",
+        on_delete=models.CASCADE,
+    )
 
 class ArticleBlogPage(BlogDetailPage):
     """Blog post page for articles."""
@@ -217,6 +343,13 @@ class ArticleBlogPage(BlogDetailPage):
         FieldPanel("intro_image"),
     ]
 
+    search_fields = BlogDetailPage.search_fields + [
+        index.SearchField("subtitle", boost=1.5),
+    ]
+
+    prefetch_stream_fields = BlogDetailPage.prefetch_stream_fields + ["intro_image"]
+    prefetch_rendition_specs = BlogDetailPage.prefetch_rendition_specs + ["fill-1400x400"]
+
 class VideoBlogPage(BlogDetailPage):
     """Blog post page for videos."""
     template = "blog/video_blog_page.html"
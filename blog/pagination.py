@@ -0,0 +1,147 @@
+"""Keyset (seek) pagination for blog post listings.
+
+Posts are ordered by ``(first_published_at, id)`` descending and pages are
+addressed by the last/first entry of the neighbouring page, so deep pages
+cost the same as the first one: no ``OFFSET`` and no ``COUNT(*)``.
+:class:`IndexedKeysetPaginator` seeks in the precomputed list of posts kept
+by blog.taxonomy.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.utils import timezone
+
+
+class InvalidCursor(ValueError):
+    """Raised when an ``?after=`` / ``?before=`` token can't be decoded."""
+
+
+def encode_cursor(published_at, pk):
+    """Return an opaque, URL-safe token for a ``(first_published_at, id)`` pair."""
+    raw = f"{published_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Turn a token from :func:`encode_cursor` back into ``(datetime, int)``."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        published_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        published_at, pk = datetime.fromisoformat(published_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(token) from e
+    # Tokens we hand out are always aware; a naive one can't be compared.
+    if timezone.is_naive(published_at):
+        raise InvalidCursor(token)
+    return published_at, pk
+
+
+class KeysetPage:
+    """A single page of results, iterable like a Django ``Page``."""
+
+    def __init__(self, object_list, has_next, has_previous, paginator):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.paginator = paginator
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            last = self.object_list[-1]
+            return encode_cursor(last.first_published_at, last.pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            first = self.object_list[0]
+            return encode_cursor(first.first_published_at, first.pk)
+        return None
+
+
+def _first_older(entries, key):
+    """Index of the first entry older than ``key`` in newest-first ``entries``."""
+    lo, hi = 0, len(entries)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if entries[mid] < key:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _first_not_newer(entries, key):
+    """Index of the first entry no newer than ``key`` in newest-first ``entries``."""
+    lo, hi = 0, len(entries)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if entries[mid] <= key:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class IndexedKeysetPaginator:
+    """Keyset pagination over a precomputed list of post entries.
+
+    ``entries`` are ``(first_published_at, id)`` pairs, newest first (see
+    blog.taxonomy). Cursors are located by binary search and only the posts
+    of the requested page are fetched from ``queryset``; the count is exact
+    and free.
+    """
+
+    def __init__(self, entries, queryset, per_page):
+        self.entries = entries
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def _page(self, start, end, has_next, has_previous):
+        ids = [pk for _, pk in self.entries[start:end]]
+        posts = {post.pk: post for post in self.queryset.filter(pk__in=ids)}
+        # A post unpublished since the index was built is simply left out.
+        rows = [posts[pk] for pk in ids if pk in posts]
+        return KeysetPage(rows, has_next, has_previous, self)
+
+    def page(self, after=None, before=None):
+        """Return the page following ``after`` or preceding ``before``.
+
+        Both arguments are cursor tokens; with neither, the first page is
+        returned. Raises :class:`InvalidCursor` for malformed tokens.
+        """
+        total = len(self.entries)
+        if after:
+            start = _first_older(self.entries, decode_cursor(after))
+            end = start + self.per_page
+            return self._page(start, end, end < total, True)
+        if before:
+            end = _first_not_newer(self.entries, decode_cursor(before))
+            start = max(0, end - self.per_page)
+            return self._page(start, end, True, start > 0)
+        return self._page(0, self.per_page, self.per_page < total, False)
+
+    @property
+    def count(self):
+        return len(self.entries)
+
+    @property
+    def num_pages(self):
+        return max(1, -(-self.count // self.per_page))
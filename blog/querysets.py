@@ -0,0 +1,43 @@
+"""Querysets for blog posts that load listing data in bulk."""
+from wagtail.models import PageManager
+from wagtail.query import PageQuerySet
+
+from core.page_urls import resolve_urls
+from streams.prefetch import prefetch_stream_values
+
+
+class BlogDetailPageQuerySet(PageQuerySet):
+    """Page queryset with helpers for rendering many posts at once."""
+
+    def for_listing(self):
+        """Return specific posts with their categories, tags and authors prefetched.
+
+        The number of queries depends on the number of post types, not on the
+        number of posts.
+        """
+        return self.specific().prefetch_related(
+            "categories",
+            "tags",
+            "blog_authors__author",
+        )
+
+
+BlogDetailPageManager = PageManager.from_queryset(BlogDetailPageQuerySet)
+
+
+LISTING_RENDITION_SPECS = ["fill-250x250"]
+
+
+def prepare_for_listing(posts, request=None):
+    """Attach ``listing_image`` and ``listing_url`` to each post in ``posts``.
+
+    Banner images of all posts and their listing renditions are fetched with
+    two queries, and URLs are resolved in bulk through the page URL index.
+    """
+    posts = list(posts)
+    prefetch_stream_values((post.banner_image for post in posts), LISTING_RENDITION_SPECS)
+    urls = resolve_urls([post.pk for post in posts], request)
+    for post in posts:
+        post.listing_image = post.banner
+        post.listing_url = urls[post.pk]
+    return posts
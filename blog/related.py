@@ -0,0 +1,185 @@
+"""Precomputed "related posts" for blog posts.
+
+Posts are related by the tags, categories and authors they share. Each
+shared feature adds its weight from ``RELATED_POSTS_WEIGHTS``, scaled by
+how rare the feature is (``log(1 + posts / posts_with_feature)``).
+Features used by more than ``RELATED_POSTS_MAX_FEATURE_POSTS`` posts are
+ignored. Scores come from the feature posting lists of blog.taxonomy: a
+post's row of the sparse post x post similarity matrix is the sum of the
+posting lists of its features.
+
+For each post the best ``STORED_PER_POST`` IDs and their scores are packed
+into two arrays under ``related_posts:<id>`` in the shared cache. The
+``compute_related_posts`` command fills every entry. blog.signals refreshes
+a post's entry when it is published and adds the post to the entries of
+its closest neighbours. Entries that are missing are computed on first
+read, and expire after ``RELATED_POSTS_TIMEOUT`` so that entries of deleted
+posts don't stay in the shared cache for good. Posts that are no longer live
+are filtered out when reading.
+"""
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import bump
+from mysite.db_routers import use_primary
+
+from .taxonomy import get_index
+
+STORED_PER_POST = 12
+ENTRY_TIMEOUT = 60 * 60 * 24 * 7
+DEFAULT_WEIGHTS = {"tag": 1.0, "category": 0.5, "author": 0.75}
+
+
+def entry_key(post_id):
+    return f"related_posts:{post_id}"
+
+
+def pack(ranked):
+    """Store ``[(post_id, score)]`` as two arrays of bytes."""
+    return (
+        array("I", [pk for pk, _ in ranked]).tobytes(),
+        array("f", [score for _, score in ranked]).tobytes(),
+    )
+
+
+def unpack(value):
+    ids, scores = array("I"), array("f")
+    ids.frombytes(value[0])
+    scores.frombytes(value[1])
+    return list(zip(ids, scores))
+
+
+class FeatureModel:
+    """Weighted posting lists ``{(kind, key): [post_id, ...]}`` of an index."""
+
+    def __init__(self, index):
+        kind_weights = getattr(settings, "RELATED_POSTS_WEIGHTS", DEFAULT_WEIGHTS)
+        max_posts = getattr(settings, "RELATED_POSTS_MAX_FEATURE_POSTS", 5000)
+        total = len(index.posts)
+        # Newer posts win ties.
+        self.rank = {pk: i for i, (_, pk) in enumerate(index.posts)}
+        self.postings = {}
+        self.weights = {}
+        for kind, terms in (
+            ("tag", index.tags),
+            ("category", index.categories),
+            ("author", index.authors),
+        ):
+            weight = kind_weights.get(kind, 0)
+            for key, (_, entries) in terms.items():
+                if weight and 1 < len(entries) <= max_posts:
+                    self.postings[(kind, key)] = [pk for _, pk in entries]
+                    self.weights[(kind, key)] = weight * math.log(1 + total / len(entries))
+
+    def features_by_post(self):
+        features = defaultdict(list)
+        for feature, post_ids in self.postings.items():
+            for pk in post_ids:
+                features[pk].append(feature)
+        return features
+
+    def scores(self, post_id, features):
+        scores = defaultdict(float)
+        for feature in features:
+            weight = self.weights.get(feature)
+            if weight:
+                for pk in self.postings[feature]:
+                    scores[pk] += weight
+        scores.pop(post_id, None)
+        return scores
+
+    def top(self, scores, limit=STORED_PER_POST):
+        far = len(self.rank)
+        return heapq.nlargest(
+            limit, scores.items(), key=lambda item: (item[1], -self.rank.get(item[0], far))
+        )
+
+
+_model = {"index": None, "model": None}
+
+
+def get_model():
+    """The feature model of the current taxonomy index, built once per version."""
+    index = get_index()
+    if _model["index"] is not index:
+        _model["model"] = FeatureModel(index)
+        _model["index"] = index
+    return _model["model"]
+
+
+def post_features(post):
+    """Features of ``post`` read from the post itself (it may be newer than the index)."""
+    return [
+        *(("tag", tag.slug) for tag in post.tags.all()),
+        *(("category", category.slug) for category in post.categories.all()),
+        *(("author", item.author_id) for item in post.blog_authors.all()),
+    ]
+
+
+def compute(post):
+    """Score ``post`` against the archive and store its entry; return it."""
+    model = get_model()
+    with use_primary():
+        features = post_features(post)
+    ranked = model.top(model.scores(post.pk, features))
+    timeout = getattr(settings, "RELATED_POSTS_TIMEOUT", ENTRY_TIMEOUT)
+    cache.set(entry_key(post.pk), pack(ranked), timeout)
+    return ranked
+
+
+def refresh_post(post):
+    """Recompute ``post``'s entry and add it to its neighbours' entries.
+
+    Scores are symmetric, so a neighbour's entry only changes if ``post``
+    now beats its weakest related post. Pages whose entries changed have
+    their ``page:<id>`` cache tag bumped.
+    """
+    model = get_model()
+    with use_primary():
+        features = post_features(post)
+    scores = model.scores(post.pk, features)
+    ranked = model.top(scores)
+    neighbours = model.top(scores, getattr(settings, "RELATED_POSTS_REFRESH_NEIGHBOURS", 200))
+    timeout = getattr(settings, "RELATED_POSTS_TIMEOUT", ENTRY_TIMEOUT)
+
+    stored = cache.get_many([entry_key(pk) for pk, _ in neighbours])
+    updates = {entry_key(post.pk): pack(ranked)}
+    for pk, score in neighbours:
+        value = stored.get(entry_key(pk))
+        if value is None:
+            continue
+        entry = [item for item in unpack(value) if item[0] != post.pk]
+        if len(entry) < STORED_PER_POST or score > entry[-1][1]:
+            entry = model.top(dict([*entry, (post.pk, score)]))
+            updates[entry_key(pk)] = pack(entry)
+    cache.set_many(updates, timeout)
+    bump(*(f"page:{pk}" for pk, _ in neighbours if entry_key(pk) in updates), namespace="blog")
+
+
+def forget(post_id):
+    cache.delete(entry_key(post_id))
+
+
+def get_related_ids(post, limit=None):
+    value = cache.get(entry_key(post.pk))
+    ranked = unpack(value) if value is not None else compute(post)
+    return [pk for pk, _ in ranked][: limit or STORED_PER_POST]
+
+
+def get_related_posts(post, limit=None):
+    """Related live, public posts of ``post``, best first."""
+    # blog.models shows these on every post.
+    from .models import BlogDetailPage
+
+    limit = limit or getattr(settings, "RELATED_POSTS_COUNT", 4)
+    ids = get_related_ids(post)
+    posts = {
+        related.pk: related
+        for related in BlogDetailPage.objects.live().public().filter(pk__in=ids).for_listing()
+    }
+    return [posts[pk] for pk in ids if pk in posts][:limit]
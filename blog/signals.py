@@ -0,0 +1,158 @@
+"""Keep the blog's cached fragments in step with content changes."""
+from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from taggit.models import Tag
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, ReferenceIndex
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from core.api import api_tag
+from core.cache import bump
+from core.page_tree import pages_published
+
+from . import feeds, related
+from .models import BlogAuthor, BlogAuthorsOrderable, BlogCategory, BlogDetailPage
+from .taxonomy import TAXONOMY_TAG
+
+NAMESPACE = "blog"
+
+
+def invalidate_posts(post_ids):
+    """Drop the listing preview and cached page of each post, plus the listing's own keys."""
+    post_ids = list(post_ids)
+    bump(
+        "blog_listing",
+        *(f"blog_post_preview:{post_id}" for post_id in post_ids),
+        *(f"page:{post_id}" for post_id in post_ids),
+        api_tag("pages"),
+        namespace=NAMESPACE,
+    )
+
+
+def index_changed():
+    """The taxonomy index, and the feeds built from it, are out of date."""
+    bump(TAXONOMY_TAG, namespace=NAMESPACE)
+    if getattr(settings, "BLOG_FEED_STATIC_ROOT", None):
+        transaction.on_commit(feeds.write_all_static_feeds)
+
+
+def post_changed(sender, instance, **kwargs):
+    if isinstance(instance, BlogDetailPage):
+        invalidate_posts([instance.pk])
+        index_changed()
+
+
+def posts_added(sender, instances, **kwargs):
+    post_ids = [page.pk for page in instances if isinstance(page, BlogDetailPage)]
+    if post_ids:
+        invalidate_posts(post_ids)
+        index_changed()
+
+
+def subtree_urls_changed(sender, instance, **kwargs):
+    # Previews show each post's URL, which changes with any of its ancestors.
+    invalidate_posts(
+        BlogDetailPage.objects.descendant_of(instance, inclusive=True).values_list("pk", flat=True)
+    )
+
+
+def post_published(sender, instance, **kwargs):
+    if isinstance(instance, BlogDetailPage):
+        # After commit, so the taxonomy index it scores against includes the post.
+        transaction.on_commit(lambda: related.refresh_post(instance))
+
+
+def posts_published(sender, instances, **kwargs):
+    posts = [page for page in instances if isinstance(page, BlogDetailPage)]
+
+    def compute_all():
+        # Only the new posts' own entries; compute_related_posts redoes the rest.
+        for post in posts:
+            related.compute(post)
+
+    if posts:
+        transaction.on_commit(compute_all)
+
+
+def post_removed(sender, instance, **kwargs):
+    if isinstance(instance, BlogDetailPage):
+        related.forget(instance.pk)
+
+
+def taxonomy_changed(sender, instance, **kwargs):
+    # Tag names and view restrictions feed blog.taxonomy; the listing shows both.
+    bump("blog_listing", namespace=NAMESPACE)
+    index_changed()
+
+
+def image_changed(sender, instance, **kwargs):
+    page_ids = (
+        ReferenceIndex.get_references_to(instance)
+        .filter(base_content_type=ContentType.objects.get_for_model(Page))
+        .values_list("object_id", flat=True)
+    )
+    post_ids = BlogDetailPage.objects.filter(pk__in=[int(pk) for pk in page_ids])
+    invalidate_posts(post_ids.values_list("pk", flat=True))
+
+
+def author_post_ids(author):
+    return BlogAuthorsOrderable.objects.filter(author=author).values_list("page_id", flat=True)
+
+
+def category_post_ids(category):
+    through = BlogDetailPage.categories.through
+    return through.objects.filter(blogcategory=category).values_list("blogdetailpage_id", flat=True)
+
+
+AFFECTED_POSTS = {BlogAuthor: author_post_ids, BlogCategory: category_post_ids}
+
+
+def remember_affected_posts(sender, instance, **kwargs):
+    # By post_delete the cascade has removed the rows linking posts to it.
+    instance._affected_post_ids = list(AFFECTED_POSTS[sender](instance))
+
+
+def affected_posts(sender, instance):
+    post_ids = getattr(instance, "_affected_post_ids", None)
+    return AFFECTED_POSTS[sender](instance) if post_ids is None else post_ids
+
+
+def author_changed(sender, instance, **kwargs):
+    invalidate_posts(affected_posts(sender, instance))
+    index_changed()
+
+
+def category_changed(sender, instance, **kwargs):
+    invalidate_posts(affected_posts(sender, instance))
+    index_changed()
+
+
+def register_signal_handlers():
+    page_published.connect(post_changed)
+    pages_published.connect(posts_added)
+    page_published.connect(post_published)
+    pages_published.connect(posts_published)
+    page_unpublished.connect(post_removed)
+    post_delete.connect(post_removed)
+    page_unpublished.connect(post_changed)
+    post_page_move.connect(post_changed)
+    page_slug_changed.connect(subtree_urls_changed)
+    post_page_move.connect(subtree_urls_changed)
+    post_delete.connect(post_changed)
+
+    image_model = get_image_model()
+    post_save.connect(image_changed, sender=image_model)
+    post_delete.connect(image_changed, sender=image_model)
+
+    post_save.connect(author_changed, sender=BlogAuthor)
+    pre_delete.connect(remember_affected_posts, sender=BlogAuthor)
+    post_delete.connect(author_changed, sender=BlogAuthor)
+    post_save.connect(category_changed, sender=BlogCategory)
+    pre_delete.connect(remember_affected_posts, sender=BlogCategory)
+    post_delete.connect(category_changed, sender=BlogCategory)
+    post_save.connect(taxonomy_changed, sender=Tag)
+    post_delete.connect(taxonomy_changed, sender=Tag)
+    post_save.connect(taxonomy_changed, sender=PageViewRestriction)
+    post_delete.connect(taxonomy_changed, sender=PageViewRestriction)
@@ -0,0 +1,148 @@
+"""Index of live blog posts by tag, category and author, with post counts.
+
+The index holds every live, public post as a ``(first_published_at, id)``
+entry, newest first, and for each tag, category and author the entries of
+its posts in the same order. It is built with five queries and stored in
+the shared cache under the ``blog_taxonomy`` tag. blog.signals bumps the
+tag when posts are published, unpublished, moved or deleted, when
+categories, tags or authors are edited and when view restrictions change.
+
+Each worker keeps the index in memory until the tag's version changes, so
+filtering a listing, drawing a tag cloud or the category navigation is a
+dictionary lookup. Only the posts on the current page are then fetched.
+"""
+import threading
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import get_version
+from mysite.db_routers import use_primary
+
+TAXONOMY_TAG = "blog_taxonomy"
+
+
+class Term(NamedTuple):
+    slug: str
+    name: str
+    count: int
+
+
+class TaxonomyIndex:
+    def __init__(self, posts, tags, categories, authors):
+        # posts: [(first_published_at, id)], newest first.
+        # tags/categories: {slug: (name, entries)} with entries in that order;
+        # authors: the same keyed by author ID.
+        self.posts = posts
+        self.tags = tags
+        self.categories = categories
+        self.authors = authors
+
+    def entries(self, tag=None, category=None):
+        """Entries of the posts with ``tag`` or in ``category`` (or all posts)."""
+        if tag is not None:
+            return self.tags.get(tag, ("", []))[1]
+        if category is not None:
+            return self.categories.get(category, ("", []))[1]
+        return self.posts
+
+    def category(self, slug):
+        if slug not in self.categories:
+            return None
+        name, entries = self.categories[slug]
+        return Term(slug, name, len(entries))
+
+    def category_terms(self):
+        """Every category, including empty ones, by name."""
+        return sorted(
+            (Term(slug, name, len(entries)) for slug, (name, entries) in self.categories.items()),
+            key=lambda term: term.name.casefold(),
+        )
+
+    def tag_terms(self, limit=None):
+        """Tags used by live posts, most used first."""
+        terms = sorted(
+            (Term(slug, name, len(entries)) for slug, (name, entries) in self.tags.items()),
+            key=lambda term: (-term.count, term.name.casefold()),
+        )
+        return terms[:limit] if limit else terms
+
+
+def build_index():
+    # blog.models renders listings from this index.
+    from .models import BlogAuthorsOrderable, BlogCategory, BlogDetailPage, BlogPageTag
+
+    posts = list(
+        BlogDetailPage.objects.live()
+        .public()
+        .filter(first_published_at__isnull=False)
+        .order_by("-first_published_at", "-pk")
+        .values_list("first_published_at", "pk")
+    )
+    position = {pk: i for i, (_, pk) in enumerate(posts)}
+
+    # Whole tables rather than ``IN (<every post>)``; rows of posts that
+    # aren't live are skipped here.
+    tag_names = {}
+    tag_positions = defaultdict(list)
+    for post_id, slug, name in BlogPageTag.objects.values_list(
+        "content_object_id", "tag__slug", "tag__name"
+    ):
+        if post_id in position:
+            tag_names[slug] = name
+            tag_positions[slug].append(position[post_id])
+
+    category_positions = defaultdict(list)
+    through = BlogDetailPage.categories.through
+    for post_id, category_id in through.objects.values_list("blogdetailpage_id", "blogcategory_id"):
+        if post_id in position:
+            category_positions[category_id].append(position[post_id])
+
+    author_names = {}
+    author_positions = defaultdict(list)
+    for post_id, author_id, name in BlogAuthorsOrderable.objects.values_list(
+        "page_id", "author_id", "author__name"
+    ):
+        if post_id in position:
+            author_names[author_id] = name
+            author_positions[author_id].append(position[post_id])
+
+    def entries(positions):
+        return [posts[i] for i in sorted(positions)]
+
+    tags = {slug: (tag_names[slug], entries(positions)) for slug, positions in tag_positions.items()}
+    categories = {
+        slug: (name, entries(category_positions.get(pk, ())))
+        for pk, slug, name in BlogCategory.objects.values_list("pk", "slug", "name")
+    }
+    authors = {
+        pk: (author_names[pk], entries(positions)) for pk, positions in author_positions.items()
+    }
+    return TaxonomyIndex(posts, tags, categories, authors)
+
+
+class _State:
+    index = None
+    version = None
+
+
+_state = _State()
+_lock = threading.Lock()
+
+
+def get_index():
+    """Return the index for the current version of the ``blog_taxonomy`` tag."""
+    version = get_version(TAXONOMY_TAG)
+    if version != _state.version:
+        with _lock:
+            if version != _state.version:
+                with use_primary():
+                    _state.index = cache.get_or_set(
+                        f"blog_taxonomy:{version}",
+                        build_index,
+                        getattr(settings, "BLOG_TAXONOMY_TIMEOUT", 60 * 60 * 24),
+                    )
+                _state.version = version
+    return _state.index
@@ -1,3 +1,338 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+
+from core.cache import get_version
+
+from . import related
+
+from .models import (
+    ArticleBlogPage,
+    BlogAuthor,
+    BlogAuthorsOrderable,
+    BlogCategory,
+    BlogDetailPage,
+    BlogListingPage,
+    VideoBlogPage,
+)
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .querysets import prepare_for_listing
+from .taxonomy import TAXONOMY_TAG, get_index
+
+
+class BlogListingQueryCountTests(TestCase):
+    """Listing posts costs the same number of queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        cls.listing = root.add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+
+    def add_posts(self, count):
+        for i in range(count):
+            page_class = ArticleBlogPage if i % 2 else VideoBlogPage
+            self.listing.add_child(
+                instance=page_class(
+                    title=f"Post {i}",
+                    slug=f"post-{self.listing.get_children_count()}",
+                    custom_title=f"Post {i}",
+                )
+            )
+
+    def count_listing_queries(self):
+        # Start from cold caches each time (site root paths, page URL index).
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            posts = prepare_for_listing(BlogDetailPage.objects.live().for_listing())
+            for post in posts:
+                getattr(post.specific, "subtitle", None)
+                list(post.categories.all())
+                list(post.tags.all())
+                list(post.blog_authors.all())
+        return len(ctx.captured_queries), len(posts)
+
+    def test_query_count_is_constant(self):
+        self.add_posts(2)
+        small_queries, small_count = self.count_listing_queries()
+
+        self.add_posts(8)
+        large_queries, large_count = self.count_listing_queries()
+
+        self.assertEqual(small_count, 2)
+        self.assertEqual(large_count, 10)
+        self.assertEqual(small_queries, large_queries)
+
+
+class BlogFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        post = self.listing.add_child(
+            instance=ArticleBlogPage(title="Post", slug="post", custom_title="Post", live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.save_revision().publish()
+            post.save_revision().publish()
+        self.url = self.listing.url + "feed/rss/"
+
+    def test_unchanged_feed_is_not_modified(self):
+        # Anonymous requests are answered by the page cache after the first
+        # one; a session cookie sends every request through feed_response.
+        session_client = Client()
+        session_client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+        for client in (self.client, session_client):
+            response = client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b"<title>Post</title>", response.content)
+
+            for headers in (
+                {"HTTP_IF_NONE_MATCH": response["ETag"]},
+                {"HTTP_IF_MODIFIED_SINCE": response["Last-Modified"]},
+            ):
+                with self.subTest(client=client, headers=headers):
+                    self.assertEqual(client.get(self.url, **headers).status_code, 304)
+
+    def test_unpublishing_the_newest_post_modifies_the_feed(self):
+        newest = self.listing.add_child(
+            instance=ArticleBlogPage(title="Newer", slug="newer", custom_title="Newer", live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            newest.save_revision().publish()
+        session_client = Client()
+        session_client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+        last_modified = {}
+        for client in (self.client, session_client):
+            response = client.get(self.url)
+            self.assertIn(b"<title>Newer</title>", response.content)
+            last_modified[client] = response["Last-Modified"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogDetailPage.objects.get(pk=newest.pk).unpublish()
+
+        for client in (self.client, session_client):
+            with self.subTest(client=client):
+                response = client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified[client])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(b"<title>Newer</title>", response.content)
+                self.assertIn(b"<title>Post</title>", response.content)
+
+
+class SnippetDeleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        self.post = listing.add_child(
+            instance=ArticleBlogPage(title="Post", slug="post", custom_title="Post")
+        )
+
+    def assert_deleting_bumps_post(self, snippet):
+        tags = [f"page:{self.post.pk}", f"blog_post_preview:{self.post.pk}"]
+        versions = [get_version(tag) for tag in tags]
+        with self.captureOnCommitCallbacks(execute=True):
+            snippet.delete()
+        for tag, version in zip(tags, versions):
+            self.assertNotEqual(get_version(tag), version, tag)
+
+    def test_deleting_an_author_bumps_their_posts(self):
+        author = BlogAuthor.objects.create(name="Author")
+        BlogAuthorsOrderable.objects.create(page=self.post, author=author)
+        self.assert_deleting_bumps_post(author)
+
+    def test_deleting_a_category_bumps_its_posts(self):
+        category = BlogCategory.objects.create(name="News", slug="news")
+        BlogDetailPage.categories.through.objects.create(
+            blogdetailpage=self.post, blogcategory=category
+        )
+        self.assert_deleting_bumps_post(category)
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=directory)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.export_path = os.path.join(directory, "posts.jsonl")
+
+        home = Page.objects.get(depth=2)
+        listing = home.add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        self.target = home.add_child(
+            instance=BlogListingPage(title="Copy", slug="copy", custom_title="Copy")
+        )
+        Image = get_image_model()
+        self.kept = Image.objects.create(title="Kept", file=get_test_image_file("kept.png"))
+        self.gone = Image.objects.create(title="Gone", file=get_test_image_file("gone.png"))
+        self.category = BlogCategory.objects.create(name="Local News", slug="local-news")
+        post = listing.add_child(
+            instance=ArticleBlogPage(
+                title="Post",
+                slug="post",
+                custom_title="Post",
+                subtitle="Sub",
+                banner_image=[("image", self.kept)],
+                content=[("full_richtext", "<p>Hello</p>"), ("image", self.gone)],
+            )
+        )
+        post.tags.add("wagtail")
+        post.categories = [self.category]
+        post.blog_authors = [BlogAuthorsOrderable(author=BlogAuthor.objects.create(name="Ann"))]
+        post.save()
+
+    def test_export_and_import_round_trip(self):
+        call_command("export_blog_posts", self.export_path, stderr=io.StringIO())
+        gone_pk = self.gone.pk
+        self.gone.delete()
+        self.category.delete()
+
+        stderr = io.StringIO()
+        call_command(
+            "import_blog_posts", self.export_path, parent=self.target.pk,
+            stdout=io.StringIO(), stderr=stderr,
+        )
+
+        copy = ArticleBlogPage.objects.child_of(self.target).get(slug="post")
+        self.assertEqual((copy.custom_title, copy.subtitle), ("Post", "Sub"))
+        self.assertEqual([block.value for block in copy.banner_image], [self.kept])
+        self.assertEqual([block.block_type for block in copy.content], ["full_richtext"])
+        self.assertEqual([tag.name for tag in copy.tags.all()], ["wagtail"])
+        self.assertEqual(
+            [(c.slug, c.name) for c in copy.categories.all()], [("local-news", "Local News")]
+        )
+        self.assertEqual([item.author.name for item in copy.blog_authors.all()], ["Ann"])
+        self.assertIn(f"post: dropped image {gone_pk}", stderr.getvalue())
+
+
+class BlogListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.save_revision().publish()
+
+    def add_post(self, slug):
+        return self.listing.add_child(
+            instance=ArticleBlogPage(title=slug, slug=slug, custom_title=slug, live=False)
+        )
+
+    def test_naive_cursor_is_invalid(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_post("post").save_revision().publish()
+        naive = encode_cursor(datetime(2024, 1, 1), 1)
+        aware = encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), 1)
+
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(naive)
+        self.assertEqual(decode_cursor(aware), (datetime(2024, 1, 1, tzinfo=timezone.utc), 1))
+        # The listing falls back to the first page instead of failing.
+        request = RequestFactory().get(self.listing.url, {"after": naive})
+        context = self.listing.specific.get_context(request)
+        self.assertEqual([post.slug for post in context["posts"]], ["post"])
+
+    @override_settings(BLOG_POSTS_PER_PAGE=2)
+    def test_category_view_is_paged(self):
+        category = BlogCategory.objects.create(name="News", slug="news")
+        posts = []
+        for i in range(3):
+            post = self.add_post(f"post-{i}")
+            post.categories = [category]
+            post.first_published_at = datetime(2024, 1, 1 + i, tzinfo=timezone.utc)
+            with self.captureOnCommitCallbacks(execute=True):
+                post.save_revision().publish()
+            posts.append(post)
+        listing = self.listing.specific
+        url = listing.url + listing.reverse_subpage("category_view", kwargs={"cat_slug": "news"})
+
+        first = self.client.get(url).context["posts"]
+        self.assertEqual([post.slug for post in first], ["post-2", "post-1"])
+        self.assertTrue(first.has_next())
+        second = self.client.get(url, {"after": first.next_cursor}).context["posts"]
+        self.assertEqual([post.slug for post in second], ["post-0"])
+        self.assertFalse(second.has_next())
+
+    def test_taxonomy_is_bumped_when_the_transaction_commits(self):
+        version = get_version(TAXONOMY_TAG)
+        post = self.add_post("post")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.save_revision().publish()
+            self.assertEqual(get_version(TAXONOMY_TAG), version)
+        self.assertEqual(get_version(TAXONOMY_TAG), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(TAXONOMY_TAG), version)
+        self.assertIn(post.pk, [pk for _, pk in get_index().entries()])
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+
+    def publish(self, slug, *tags):
+        post = self.listing.add_child(
+            instance=ArticleBlogPage(title=slug, slug=slug, custom_title=slug, live=False)
+        )
+        post.tags.add(*tags)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        return ArticleBlogPage.objects.get(pk=post.pk)
+
+    def related_slugs(self, post):
+        return [page.slug for page in related.get_related_posts(post)]
+
+    def test_posts_sharing_more_features_rank_first(self):
+        post = self.publish("post", "django", "wagtail")
+        self.publish("one", "django")
+        self.publish("both", "django", "wagtail")
+        self.publish("none", "python")
+        self.assertEqual(self.related_slugs(post), ["both", "one"])
+
+    def test_publishing_adds_the_post_to_its_neighbours(self):
+        post = self.publish("post", "django")
+        self.assertEqual(self.related_slugs(post), [])
+        self.publish("newer", "django")
+        with mock.patch.object(related, "compute", wraps=related.compute) as compute:
+            self.assertEqual(self.related_slugs(post), ["newer"])
+        compute.assert_not_called()
+
+    def test_posts_that_are_no_longer_live_are_left_out(self):
+        post = self.publish("post", "django")
+        other = self.publish("other", "django")
+        self.assertEqual(self.related_slugs(post), ["other"])
+        with self.captureOnCommitCallbacks(execute=True):
+            other.unpublish()
+        self.assertEqual(self.related_slugs(post), [])
+
+    @override_settings(RELATED_POSTS_TIMEOUT=60)
+    def test_entries_expire(self):
+        post = self.publish("post", "django")
+        with mock.patch.object(related.cache, "set") as cache_set:
+            related.compute(post)
+        self.assertEqual(cache_set.call_args.args[2], 60)
@@ -0,0 +1,170 @@
+"""Convert blog posts to and from newline-delimited JSON records.
+
+One record per post::
+
+    {"type": "blog.ArticleBlogPage", "id": 12, "title": ..., "slug": ...,
+     "fields": {...}, "streams": {"content": [...]}, "tags": [...],
+     "categories": [{"slug": ..., "name": ...}], "authors": [...],
+     "images": {"7": "original_images/a.jpg"}}
+
+``fields`` holds the type's own plain columns, ``streams`` the raw JSON of
+its StreamFields. Image references stay as IDs inside the streams; ``images``
+maps them to file names so an import into another database can remap them.
+References to images that aren't there are dropped and listed in
+``RecordLoader.missing_images``.
+"""
+from collections import defaultdict
+
+from django.db import models
+from django.utils.dateparse import parse_datetime
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+from streams.prefetch import collect_references, remap_references
+
+from .models import BlogAuthor, BlogAuthorsOrderable, BlogCategory, BlogDetailPage
+
+PAGE_FIELDS = [
+    "title",
+    "slug",
+    "seo_title",
+    "search_description",
+    "live",
+    "first_published_at",
+    "last_published_at",
+]
+
+
+def post_types():
+    return {
+        f"{model._meta.app_label}.{model.__name__}": model
+        for model in [BlogDetailPage, *BlogDetailPage.__subclasses__()]
+    }
+
+
+def own_fields(model):
+    """Concrete fields added by ``model`` and its blog ancestors (not Page's)."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if field.model is not Page
+        and not field.primary_key
+        and not isinstance(field, models.OneToOneField)
+    ]
+
+
+def post_to_record(post):
+    """Serialize a specific post with prefetched tags, categories and authors."""
+    record = {"type": f"{post._meta.app_label}.{type(post).__name__}", "id": post.pk}
+    for name in PAGE_FIELDS:
+        record[name] = getattr(post, name)
+    record["fields"] = {}
+    record["streams"] = {}
+    stream_values = []
+    for field in own_fields(type(post)):
+        value = getattr(post, field.name)
+        if isinstance(field, StreamField):
+            record["streams"][field.name] = list(value.raw_data) if value else []
+            stream_values.append(value)
+        else:
+            record["fields"][field.name] = value
+    record["tags"] = [tag.name for tag in post.tags.all()]
+    record["categories"] = [
+        {"slug": category.slug, "name": category.name} for category in post.categories.all()
+    ]
+    record["authors"] = [item.author.name for item in post.blog_authors.all()]
+    image_ids = collect_references(stream_values)[get_image_model()]
+    record["images"] = {str(pk): pk for pk in image_ids}
+    return record
+
+
+def resolve_images(records):
+    """Fill ``images`` in exported records with file names, one query per batch."""
+    ids = {int(pk) for record in records for pk in record["images"]}
+    files = dict(get_image_model().objects.filter(pk__in=ids).values_list("pk", "file"))
+    for record in records:
+        record["images"] = {pk: files.get(int(pk)) for pk in record["images"]}
+    return records
+
+
+def category_fields(category):
+    """``(slug, name)`` of a record's category; older exports only have the slug."""
+    if isinstance(category, str):
+        return category, category
+    return category["slug"], category["name"]
+
+
+class RecordLoader:
+    """Build unsaved posts from records, resolving related objects per batch.
+
+    ``missing_images`` collects ``(slug, old_pk, file)`` for every image
+    reference that was dropped because no image with that file exists.
+    """
+
+    def __init__(self):
+        self.types = post_types()
+        self.categories = {}
+        self.authors = {}
+        self.missing_images = []
+
+    def load_related(self, records):
+        names = {}
+        for record in records:
+            for category in record["categories"]:
+                slug, name = category_fields(category)
+                names.setdefault(slug, name)
+        slugs = set(names) - set(self.categories)
+        for category in BlogCategory.objects.filter(slug__in=slugs):
+            self.categories[category.slug] = category
+        for slug in slugs - set(self.categories):
+            self.categories[slug] = BlogCategory.objects.create(name=names[slug], slug=slug)
+
+        names = {name for record in records for name in record["authors"]} - set(self.authors)
+        for author in BlogAuthor.objects.filter(name__in=names):
+            self.authors.setdefault(author.name, author)
+        for name in names - set(self.authors):
+            self.authors[name] = BlogAuthor.objects.create(name=name)
+
+        files = {name for record in records for name in record["images"].values() if name}
+        self.images = {
+            file: pk
+            for pk, file in get_image_model().objects.filter(file__in=files).values_list("pk", "file")
+        }
+
+    def build(self, record):
+        model = self.types[record["type"]]
+        post = model(**{name: record[name] for name in PAGE_FIELDS})
+        for name in ("first_published_at", "last_published_at"):
+            if isinstance(record[name], str):
+                setattr(post, name, parse_datetime(record[name]))
+        post.has_unpublished_changes = not post.live
+
+        image_mapping = {
+            int(old_pk): self.images[file]
+            for old_pk, file in record["images"].items()
+            if file in self.images
+        }
+        mapping = {get_image_model(): image_mapping}
+        unmapped = defaultdict(set)
+        for field in own_fields(model):
+            if isinstance(field, StreamField):
+                raw = record["streams"].get(field.name, [])
+                setattr(post, field.name, remap_references(field.stream_block, raw, mapping, unmapped))
+            elif field.name in record["fields"]:
+                setattr(post, field.name, field.to_python(record["fields"][field.name]))
+
+        self.missing_images.extend(
+            (record["slug"], pk, record["images"].get(str(pk)))
+            for pk in sorted(unmapped[get_image_model()])
+        )
+
+        post.tags.add(*record["tags"])
+        post.categories = [
+            self.categories[category_fields(category)[0]] for category in record["categories"]
+        ]
+        post.blog_authors = [
+            BlogAuthorsOrderable(author=self.authors[name], sort_order=i)
+            for i, name in enumerate(record["authors"])
+        ]
+        return post
@@ -7,6 +7,7 @@ from wagtail.admin.panels import (
     MultiFieldPanel
 )
 from wagtail.fields import RichTextField
+from wagtail.search import index
 from wagtail.contrib.forms.models import AbstractFormField, AbstractEmailForm
 
 from wagtailcaptcha.models import WagtailCaptchaEmailForm
@@ -30,6 +31,10 @@ class ContactPage(WagtailCaptchaEmailForm):
     intro = RichTextField(blank=True)
     thank_you_text = RichTextField(blank=True)
 
+    search_fields = AbstractEmailForm.search_fields + [
+        index.SearchField('intro'),
+    ]
+
     content_panels = AbstractEmailForm.content_panels + [
         FieldPanel('intro'),
         InlinePanel('form_fields', label='Form Fields'),
@@ -0,0 +1,369 @@
+"""API v2 endpoints tuned for listing many objects cheaply.
+
+``APICacheMixin`` adds validators and a shared response cache to an endpoint.
+Both are derived from the version of the endpoint's ``api:<cache_name>``
+cache tag, which core.signals bumps when pages, images or documents change,
+so no body is serialized to answer a conditional request.
+
+Compared to Wagtail's ``PagesAPIViewSet`` the pages endpoint also:
+
+* paginates tree-ordered listings with ``?after=<cursor>`` instead of
+  ``offset`` (``offset``, ``order`` and ``search`` fall back to the stock
+  offset pagination),
+* defers StreamField and text columns of specific page types unless one of
+  the requested ``fields`` needs them, and
+* resolves ``html_url`` and blog child pages for a whole response at once
+  through ``PageBatch``, instead of once per page,
+* streams listings with ``?stream=true`` (up to ``API_STREAM_LIMIT_MAX``
+  items, serialized in chunks) and offers MessagePack when it is installed.
+
+``CompressedAPIRouter`` gzips every endpoint's responses, streamed or not.
+"""
+import hashlib
+import time
+from collections import OrderedDict, defaultdict
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.functional import classproperty
+from django.utils.http import http_date
+from django.views.decorators.gzip import gzip_page
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from wagtail.api.v2.pagination import WagtailPagination
+from wagtail.api.v2.router import WagtailAPIRouter
+from wagtail.api.v2.serializers import PageHtmlUrlField, PageSerializer
+from wagtail.api.v2.utils import BadRequestError
+from wagtail.api.v2.views import PagesAPIViewSet
+from wagtail.documents.api.v2.views import DocumentsAPIViewSet
+from wagtail.fields import StreamField
+from wagtail.images.api.v2.views import ImagesAPIViewSet
+from wagtail.models import Page
+
+from mysite.db_routers import use_primary
+
+from .cache import get_version, stats
+from .page_urls import resolve_full_urls, resolve_urls
+from .renderers import available_renderers, stream_json
+
+NAMESPACE = "api"
+STREAM_CHUNK_SIZE = 100
+
+
+def api_tag(name):
+    return f"api:{name}"
+
+
+class APICacheMixin:
+    """ETag/Last-Modified, 304s and a shared cache for anonymous reads."""
+
+    # The endpoint's cache tag and API_CACHE_CONTROL entry. Not ``name``:
+    # ViewSetMixin.as_view() resets that to None.
+    cache_name = None
+
+    def get_cache_control(self):
+        config = getattr(settings, "API_CACHE_CONTROL", {})
+        return config.get(self.cache_name, config.get("default", {"no_cache": True}))
+
+    def get_validators(self, request):
+        tag = api_tag(self.cache_name)
+        version = get_version(tag)
+        # The first request after a bump fixes the Last-Modified time.
+        modified_key = f"api_modified:{tag}:{version}"
+        cache.add(modified_key, int(time.time()), None)
+        last_modified = cache.get(modified_key) or int(time.time())
+        digest = hashlib.md5(
+            "|".join([
+                str(version),
+                request.get_full_path(),
+                request.headers.get("Accept", ""),
+            ]).encode()
+        ).hexdigest()
+        return digest, last_modified
+
+    def is_cacheable_request(self, request):
+        return (
+            request.method in ("GET", "HEAD")
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        digest, last_modified = self.get_validators(request)
+        etag = f'"{digest}"'
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            stats.record(NAMESPACE, "not_modified")
+            return self.add_caching_headers(request, response, etag, last_modified)
+
+        cacheable = self.is_cacheable_request(request)
+        key = f"api_response:{digest}"
+        entry = cache.get(key) if cacheable else None
+        if entry is not None:
+            stats.record(NAMESPACE, "hits")
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+            return self.add_caching_headers(request, response, etag, last_modified)
+
+        # What is served now may be cached under a version that was just
+        # bumped, so read it from the primary rather than a lagging replica.
+        with use_primary():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.streaming:
+                response.render()
+        if response.status_code != 200:
+            return response
+        if response.streaming:
+            return self.add_caching_headers(request, response, etag, last_modified)
+        if cacheable:
+            stats.record(NAMESPACE, "misses")
+            cache.set(
+                key,
+                {"content": response.content, "content_type": response["Content-Type"]},
+                getattr(settings, "API_CACHE_TIMEOUT", 600),
+            )
+        return self.add_caching_headers(request, response, etag, last_modified)
+
+    def add_caching_headers(self, request, response, etag, last_modified):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            # Restricted pages may be visible to this session only.
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, **self.get_cache_control())
+        patch_vary_headers(response, ["Accept", "Cookie"])
+        return response
+
+
+class PageBatch:
+    """Data shared by every page of one API response, loaded on first use."""
+
+    def __init__(self, pages, request=None):
+        self.pages = list(pages)
+        self.request = request
+
+    @cached_property
+    def full_urls(self):
+        return resolve_full_urls([page.pk for page in self.pages])
+
+    @cached_property
+    def _children(self):
+        # One query for the live, public children of every page in the batch.
+        condition = Q()
+        for page in self.pages:
+            condition |= Q(path__startswith=page.path, depth=page.depth + 1)
+        children = defaultdict(list)
+        if self.pages:
+            for child in Page.objects.live().public().filter(condition).order_by("path"):
+                children[child.path[: -Page.steplen]].append(child)
+        return children
+
+    @cached_property
+    def child_urls(self):
+        return resolve_urls(
+            [child.pk for children in self._children.values() for child in children],
+            self.request,
+        )
+
+    def get_children(self, page):
+        return self._children.get(page.path, [])
+
+
+class BatchedPageHtmlUrlField(PageHtmlUrlField):
+    def to_representation(self, page):
+        batch = self.context.get("page_batch")
+        if batch is None:
+            return super().to_representation(page)
+        return batch.full_urls.get(page.pk)
+
+
+class BatchedPageSerializer(PageSerializer):
+    html_url = BatchedPageHtmlUrlField(read_only=True)
+
+
+class KeysetPagination(WagtailPagination):
+    """``?after=`` keyset pagination over the tree (``path``) order."""
+
+    def use_keyset(self, queryset, request):
+        return (
+            isinstance(queryset, models.QuerySet)
+            and not {"offset", "order", "search"} & set(request.GET)
+        )
+
+    def get_limit(self, request, limit_max=None):
+        if limit_max is None:
+            limit_max = getattr(settings, "WAGTAILAPI_LIMIT_MAX", 20)
+        try:
+            limit_default = 20 if not limit_max else min(20, limit_max)
+            limit = int(request.GET.get("limit", limit_default))
+            if limit < 0:
+                raise ValueError()
+        except ValueError:
+            raise BadRequestError("limit must be a positive integer")
+        if limit_max and limit > limit_max:
+            raise BadRequestError("limit cannot be higher than %d" % limit_max)
+        return limit
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_keyset(queryset, request)
+        if not self.keyset:
+            if "after" in request.GET:
+                raise BadRequestError("after cannot be combined with offset, order or search")
+            return super().paginate_queryset(queryset, request, view)
+
+        self.view = view
+        self.request = request
+        limit = self.get_limit(request)
+        after = request.GET.get("after")
+        # Counting is only done for the first page; follow "next" for the rest.
+        self.total_count = None if after else queryset.count()
+        if after:
+            queryset = queryset.filter(path__gt=after)
+        rows = list(queryset.order_by("path")[: limit + 1])
+        self.next_cursor = rows[limit - 1].path if len(rows) > limit and limit else None
+        return rows[:limit]
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), "after", self.next_cursor
+            )
+        return Response(OrderedDict([
+            ("meta", OrderedDict([
+                ("total_count", self.total_count),
+                ("next", next_url),
+            ])),
+            ("items", data),
+        ]))
+
+
+class SitePagesAPIViewSet(APICacheMixin, PagesAPIViewSet):
+    cache_name = "pages"
+    base_serializer_class = BatchedPageSerializer
+    pagination_class = KeysetPagination
+    known_query_parameters = PagesAPIViewSet.known_query_parameters.union(["after", "stream"])
+
+    @classproperty
+    def renderer_classes(cls):
+        return PagesAPIViewSet.renderer_classes + available_renderers()
+
+    def get_base_queryset(self):
+        # Used several times per request; each call queries view restrictions.
+        if not hasattr(self, "_base_queryset"):
+            self._base_queryset = super().get_base_queryset()
+        return self._base_queryset
+
+    def get_deferred_fields(self, model):
+        """Heavy columns of ``model`` that none of the requested fields use."""
+        requested = self.get_serializer_class().Meta.fields
+        overrides = self.get_field_serializer_overrides(model)
+        safe_fields = set(self.meta_fields) | set(self.body_fields)
+        needed = set()
+        for name in requested:
+            source = getattr(overrides.get(name), "source", None) or name
+            try:
+                needed.add(model._meta.get_field(source.split(".")[0]).name)
+            except FieldDoesNotExist:
+                if name not in safe_fields:
+                    # A property or custom serializer; it may read anything.
+                    return []
+        return [
+            field.name
+            for field in model._meta.concrete_fields
+            if field.model is not Page
+            and isinstance(field, (StreamField, models.TextField, models.JSONField))
+            and field.name not in needed
+        ]
+
+    def listing_view(self, request):
+        queryset = self.get_queryset()
+        self.check_query_parameters(queryset)
+        deferred = self.get_deferred_fields(queryset.model)
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        queryset = self.filter_queryset(queryset)
+        if request.GET.get("stream") == "true":
+            return self.streaming_listing(request, queryset)
+        pages = self.paginate_queryset(queryset)
+        self.page_batch = PageBatch(pages, request)
+        serializer = self.get_serializer(self.page_batch.pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def streaming_listing(self, request, queryset):
+        """Serialize one keyset page ``STREAM_CHUNK_SIZE`` pages at a time."""
+        if not self.paginator.use_keyset(queryset, request):
+            raise BadRequestError("stream cannot be combined with offset, order or search")
+        limit = self.paginator.get_limit(
+            request, getattr(settings, "API_STREAM_LIMIT_MAX", 1000)
+        )
+        if request.GET.get("after"):
+            queryset = queryset.filter(path__gt=request.GET["after"])
+        rows = queryset.order_by("path")[: limit + 1]
+        # One serializer for the whole stream, not one per chunk with
+        # many=True: serializers are reference cycles, and each would keep its
+        # chunk of pages alive until the cyclic GC ran.
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        state = {"last_path": None, "more": False}
+
+        def serialize(chunk):
+            state["last_path"] = chunk[-1].path
+            self.page_batch = serializer.context["page_batch"] = PageBatch(chunk, request)
+            return map(serializer.to_representation, chunk)
+
+        def items():
+            # Runs after dispatch() returns; see APICacheMixin.dispatch.
+            with use_primary():
+                chunk = []
+                for count, page in enumerate(rows.iterator(chunk_size=STREAM_CHUNK_SIZE)):
+                    if count == limit:
+                        state["more"] = True
+                        break
+                    chunk.append(page)
+                    if len(chunk) == STREAM_CHUNK_SIZE:
+                        yield from serialize(chunk)
+                        chunk = []
+                if chunk:
+                    yield from serialize(chunk)
+
+        def meta():
+            next_url = None
+            if state["more"]:
+                next_url = replace_query_param(
+                    request.build_absolute_uri(), "after", state["last_path"]
+                )
+            return {"total_count": None, "next": next_url}
+
+        return StreamingHttpResponse(stream_json(items(), meta), content_type="application/json")
+
+    def detail_view(self, request, pk):
+        self.page_batch = PageBatch([self.get_object()], request)
+        return super().detail_view(request, pk)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["page_batch"] = getattr(self, "page_batch", None)
+        return context
+
+
+class SiteImagesAPIViewSet(APICacheMixin, ImagesAPIViewSet):
+    cache_name = "images"
+
+
+class SiteDocumentsAPIViewSet(APICacheMixin, DocumentsAPIViewSet):
+    cache_name = "documents"
+
+
+class CompressedAPIRouter(WagtailAPIRouter):
+    def wrap_view(self, func):
+        return gzip_page(super().wrap_view(func))
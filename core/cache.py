@@ -0,0 +1,102 @@
+"""Versioned cache keys shared by the site's caches.
+
+Cached entries embed the current version of every tag they depend on (for
+example ``page:42`` or ``blog_listing``). Invalidating a tag is a single
+``incr`` on its version counter: old entries are never looked up again and
+simply age out, so no key scans are needed. Tags bumped inside a transaction
+are bumped when it commits.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY_PREFIX = "cachever"
+
+
+def _version_key(tag):
+    return f"{VERSION_KEY_PREFIX}:{tag}"
+
+
+def _fresh_version():
+    # Seed from the clock so a version counter that gets evicted can never
+    # come back with a value an old entry was stored under.
+    return time.time_ns()
+
+
+def get_versions(tags):
+    """Return ``{tag: version}`` for ``tags`` using one ``get_many``."""
+    tags = list(tags)
+    if not tags:
+        return {}
+    stored = cache.get_many([_version_key(tag) for tag in tags])
+    versions = {}
+    for tag in tags:
+        version = stored.get(_version_key(tag))
+        if version is None:
+            version = _fresh_version()
+            if not cache.add(_version_key(tag), version, None):
+                version = cache.get(_version_key(tag), version)
+        versions[tag] = version
+    return versions
+
+
+def get_version(tag):
+    """Return the current version of a single tag."""
+    return get_versions([tag])[tag]
+
+
+def versioned_key(prefix, tags, *parts):
+    """Build a cache key that changes whenever any of ``tags`` is bumped."""
+    versions = get_versions(tags)
+    stamp = ".".join(str(versions[tag]) for tag in tags)
+    return ":".join([prefix, *(str(part) for part in parts), stamp])
+
+
+def bump(*tags, namespace="default"):
+    """Invalidate every entry that depends on any of ``tags``.
+
+    Inside a transaction the versions change once it commits. Bumping
+    earlier would let another worker rebuild an entry from the data it can
+    still see, the pre-commit data, and store it under the new version.
+    """
+    tags = set(tags)
+    transaction.on_commit(lambda: bump_now(*tags, namespace=namespace))
+
+
+def bump_now(*tags, namespace="default"):
+    """Bump ``tags`` right away; return ``{tag: new version}``."""
+    versions = {}
+    for tag in set(tags):
+        try:
+            versions[tag] = cache.incr(_version_key(tag))
+        except ValueError:
+            versions[tag] = _fresh_version()
+            cache.set(_version_key(tag), versions[tag], None)
+        stats.record(namespace, "invalidations")
+    return versions
+
+
+class CacheStats:
+    """Per-process hit/miss/invalidation counters, grouped by namespace."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: defaultdict(int))
+
+    def record(self, namespace, event, amount=1):
+        with self._lock:
+            self._counters[namespace][event] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {ns: dict(events) for ns, events in self._counters.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = CacheStats()
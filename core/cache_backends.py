@@ -0,0 +1,313 @@
+"""Two-tier cache backend: a small in-process LRU in front of a shared cache.
+
+Configure it as the ``default`` cache and point ``SHARED_CACHE`` at the alias
+of the shared backend (Redis in production, the file cache locally)::
+
+    "default": {
+        "BACKEND": "core.cache_backends.TieredCache",
+        "OPTIONS": {"SHARED_CACHE": "shared", "L1_MAX_ENTRIES": 1000, "L1_TIMEOUT": 5},
+    }
+
+Entries read from or written to the shared cache are kept in the local tier
+for at most ``L1_TIMEOUT`` seconds, so another worker's ``set``/``delete`` may
+be seen that much later. Keys starting with one of ``L1_EXCLUDE_PREFIXES``
+(the version counters of core.cache by default) always go to the shared
+cache, which keeps tag invalidation immediate across workers.
+
+``get_or_set`` recomputes a missing value only once at a time: callers in the
+same process wait for the thread computing it and other processes wait on a
+lock key in the shared cache. No lock is held while the value is computed,
+so ``default`` may itself call ``get_or_set``. A computed ``None`` is cached
+for ``NEGATIVE_TIMEOUT`` seconds.
+Hits, misses and waits are recorded in ``core.cache.stats`` under the part of
+the key before the first ``:``.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .cache import VERSION_KEY_PREFIX, stats
+
+# Django creates a backend instance per thread, so the local tier lives at
+# module level (like LocMemCache) and is shared by all threads of a worker.
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _Negative:
+    """Stored in place of a computed ``None``."""
+
+    def __reduce__(self):
+        return (_negative, ())
+
+
+def _negative():
+    return NEGATIVE
+
+
+NEGATIVE = _Negative()
+
+
+class _Flight:
+    """One computation of a key by ``get_or_set``, awaited by other threads."""
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.done = threading.Event()
+        self.ok = False
+        self.value = None
+
+
+class LRUStore:
+    """Bounded, thread-safe mapping of key -> (expires_at, value)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _namespace(key):
+    return str(key).split(":", 1)[0]
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED_CACHE", "shared")
+        self.l1_timeout = options.get("L1_TIMEOUT", 5)
+        self.negative_timeout = options.get("NEGATIVE_TIMEOUT", 60)
+        self.lock_timeout = options.get("LOCK_TIMEOUT", 10)
+        self.lock_poll_interval = options.get("LOCK_POLL_INTERVAL", 0.05)
+        self.exclude_prefixes = tuple(
+            options.get("L1_EXCLUDE_PREFIXES", [f"{VERSION_KEY_PREFIX}:"])
+        )
+        with _stores_lock:
+            if location not in _stores:
+                _stores[location] = LRUStore(options.get("L1_MAX_ENTRIES", 1000))
+                # Keys being computed by get_or_set -> _Flight.
+                _stores[location].flights = {}
+                _stores[location].flights_lock = threading.Lock()
+        self.local = _stores[location]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        if self.l1_timeout <= 0 or str(key).startswith(self.exclude_prefixes):
+            return None
+        return self.make_and_validate_key(key, version=version)
+
+    def _local_expiry(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        now = time.monotonic()
+        if timeout is None:
+            return now + self.l1_timeout
+        return now + min(timeout, self.l1_timeout)
+
+    def _remember(self, local_key, value, timeout=DEFAULT_TIMEOUT):
+        if local_key is not None:
+            self.local.set(local_key, value, self._local_expiry(timeout))
+
+    def _unwrap(self, key, value):
+        if value is NEGATIVE:
+            stats.record(_namespace(key), "negative_hits")
+            return None
+        return value
+
+    def get(self, key, default=None, version=None):
+        namespace = _namespace(key)
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            item = self.local.get(local_key, time.monotonic())
+            if item is not None:
+                stats.record(namespace, "l1_hits")
+                return self._unwrap(key, item[1])
+
+        value = self.shared.get(key, self._missing_key, version=version)
+        if value is self._missing_key:
+            stats.record(namespace, "misses")
+            return default
+        stats.record(namespace, "l2_hits")
+        self._remember(local_key, value)
+        return self._unwrap(key, value)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        now = time.monotonic()
+        for key in keys:
+            local_key = self._local_key(key, version)
+            item = self.local.get(local_key, now) if local_key is not None else None
+            if item is None:
+                remaining.append(key)
+            else:
+                stats.record(_namespace(key), "l1_hits")
+                found[key] = self._unwrap(key, item[1])
+
+        if remaining:
+            shared = self.shared.get_many(remaining, version=version)
+            for key in remaining:
+                if key in shared:
+                    stats.record(_namespace(key), "l2_hits")
+                    self._remember(self._local_key(key, version), shared[key])
+                    found[key] = self._unwrap(key, shared[key])
+                else:
+                    stats.record(_namespace(key), "misses")
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._remember(self._local_key(key, version), value, timeout)
+        stats.record(_namespace(key), "sets")
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._remember(self._local_key(key, version), value, timeout)
+            stats.record(_namespace(key), "sets")
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._remember(self._local_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.local.delete(local_key)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            local_key = self._local_key(key, version)
+            if local_key is not None:
+                self.local.delete(local_key)
+        self.shared.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.local.delete(local_key)
+        return self.shared.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None and self.local.get(local_key, time.monotonic()):
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def clear_local(self):
+        """Drop this worker's local tier only."""
+        self.local.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, self._missing_key, version=version)
+        if value is not self._missing_key:
+            return value
+
+        flight_key = self.make_and_validate_key(key, version=version)
+        with self.local.flights_lock:
+            flight = self.local.flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self.local.flights[flight_key] = _Flight()
+
+        if not leader:
+            # The thread computing it may be this one, calling itself again.
+            if flight.thread != threading.get_ident():
+                stats.record(_namespace(key), "flight_waits")
+                if flight.done.wait(self.lock_timeout) and flight.ok:
+                    return flight.value
+            return self._compute(key, default, timeout, version)
+
+        try:
+            flight.value = self._compute(key, default, timeout, version)
+            flight.ok = True
+            return flight.value
+        finally:
+            with self.local.flights_lock:
+                self.local.flights.pop(flight_key, None)
+            flight.done.set()
+
+    def _compute(self, key, default, timeout, version):
+        # Another thread may have stored it since the first lookup.
+        value = self.get(key, self._missing_key, version=version)
+        if value is not self._missing_key:
+            return value
+
+        lock_key = f"{key}:lock"
+        owns_lock = self.shared.add(lock_key, 1, self.lock_timeout, version=version)
+        if not owns_lock:
+            value = self._wait_for(key, lock_key, version)
+            if value is not self._missing_key:
+                return value
+        try:
+            value = default() if callable(default) else default
+            if value is None:
+                self.set(key, NEGATIVE, self.negative_timeout, version=version)
+            else:
+                self.set(key, value, timeout, version=version)
+        finally:
+            if owns_lock:
+                self.shared.delete(lock_key, version=version)
+        stats.record(_namespace(key), "computed")
+        return value
+
+    def _wait_for(self, key, lock_key, version):
+        """Poll the shared cache while another process computes ``key``."""
+        stats.record(_namespace(key), "stampede_waits")
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            value = self.shared.get(key, self._missing_key, version=version)
+            if value is not self._missing_key:
+                self._remember(self._local_key(key, version), value)
+                return self._unwrap(key, value)
+            if not self.shared.has_key(lock_key, version=version):
+                break
+        return self._missing_key
@@ -0,0 +1,62 @@
+"""Named responsive rendition sets (several widths in modern formats).
+
+Sets are configured in ``IMAGE_RENDITION_SETS`` as a width/crop pattern plus
+the ``sizes`` attribute; every set is produced in each format listed in
+``IMAGE_RENDITION_FORMATS``. The last format is the ``<img>`` fallback.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.images.models import Filter, Picture
+
+from mysite.db_routers import use_primary
+
+from .cache import versioned_key
+
+RENDITION_SET_TIMEOUT = 60 * 60 * 24 * 7
+
+FORMAT_MIME_TYPES = {fmt.name: fmt.mime_type for fmt in Picture.source_format_order}
+
+
+def get_set_config(name):
+    return settings.IMAGE_RENDITION_SETS[name]
+
+
+def rendition_set_specs(name):
+    """Return every filter spec in the set, e.g. ``width-800|format-webp``."""
+    formats = ",".join(getattr(settings, "IMAGE_RENDITION_FORMATS", ["webp", "jpeg"]))
+    return Filter.expand_spec(f"{get_set_config(name)['spec']}|format-{{{formats}}}")
+
+
+def get_picture(image, name, **attrs):
+    """Return a Wagtail ``Picture`` for ``image``, generating renditions in one batch."""
+    attrs.setdefault("sizes", get_set_config(name).get("sizes", "100vw"))
+    return Picture(image.get_renditions(*rendition_set_specs(name)), attrs)
+
+
+def get_rendition_set_data(image, name):
+    """Serializable form of a rendition set, cached until the image changes."""
+    key = versioned_key("rendition_set", [f"image:{image.pk}"], image.pk, name)
+    data = cache.get(key)
+    if data is None:
+        with use_primary():
+            picture = get_picture(image, name)
+        fallback_format = picture.get_fallback_format()
+        if fallback_format:
+            fallback = picture.formats[fallback_format][0]
+        else:
+            fallback = picture.renditions[0]
+        data = {
+            "sizes": get_set_config(name).get("sizes", "100vw"),
+            "sources": [
+                {
+                    "type": FORMAT_MIME_TYPES.get(fmt),
+                    "srcset": picture.get_width_srcset(renditions),
+                }
+                for fmt, renditions in picture.formats.items()
+            ],
+            "src": fallback.url,
+            "width": fallback.width,
+            "height": fallback.height,
+        }
+        cache.set(key, data, RENDITION_SET_TIMEOUT)
+    return data
@@ -0,0 +1,77 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from wagtail.models import Site
+
+from core.renderers import available_renderers
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the pages API listing rendered as plain JSON, streamed JSON and "
+        "MessagePack, with and without gzip: time, size and peak memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--type", default="blog.BlogDetailPage", help="Page type to list.")
+        parser.add_argument("--limit", type=int, default=500, help="Items per request.")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per variant.")
+        parser.add_argument("--fields", default="*", help="Value of the fields parameter.")
+
+    def handle(self, *args, type, limit, repeat, fields, **options):
+        site = Site.objects.filter(is_default_site=True).first()
+        client = Client(HTTP_HOST=site.hostname if site else "localhost")
+        # A session cookie keeps the API response cache out of the measurement.
+        client.cookies[settings.SESSION_COOKIE_NAME] = "benchmark"
+
+        params = {"type": type, "limit": limit, "fields": fields}
+        variants = [
+            ("json", {}, {}),
+            ("json+gzip", {}, {"HTTP_ACCEPT_ENCODING": "gzip"}),
+            ("stream", {"stream": "true"}, {}),
+            ("stream+gzip", {"stream": "true"}, {"HTTP_ACCEPT_ENCODING": "gzip"}),
+        ]
+        if available_renderers():
+            variants += [
+                ("msgpack", {"format": "msgpack"}, {}),
+                ("msgpack+gzip", {"format": "msgpack"}, {"HTTP_ACCEPT_ENCODING": "gzip"}),
+            ]
+        else:
+            self.stdout.write("msgpack is not installed; skipping MessagePack.")
+
+        self.stdout.write(f"{'variant':<14} {'mean ms':>9} {'bytes':>10} {'peak KiB':>9}")
+        with override_settings(
+            WAGTAILAPI_LIMIT_MAX=max(limit, getattr(settings, "WAGTAILAPI_LIMIT_MAX", 20)),
+            API_STREAM_LIMIT_MAX=max(limit, getattr(settings, "API_STREAM_LIMIT_MAX", 1000)),
+        ):
+            # Fill the fragment, URL and taxonomy caches so the first variant
+            # isn't the only one measured cold.
+            self.consume(client.get("/api/v2/pages/", params))
+            for name, extra_params, headers in variants:
+                query = {**params, **extra_params}
+                timings, size = [], 0
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    response = client.get("/api/v2/pages/", query, **headers)
+                    size = self.consume(response)
+                    timings.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        self.stderr.write(f"{name}: HTTP {response.status_code}")
+                        break
+                # tracemalloc slows requests down several times over, so the
+                # peak comes from one more request that isn't timed.
+                tracemalloc.start()
+                self.consume(client.get("/api/v2/pages/", query, **headers))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                mean = sum(timings) / len(timings) * 1000
+                self.stdout.write(f"{name:<14} {mean:>9.1f} {size:>10} {peak / 1024:>9.0f}")
+
+    def consume(self, response):
+        """Read the body like a client would, without keeping it around."""
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
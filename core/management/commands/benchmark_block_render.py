@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from wagtail.models import Page
+
+from core.cache import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering the StreamField blocks of a page with the block render "
+        "cache disabled, cold and warm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("page_id", type=int, help="Page whose blocks to render.")
+        parser.add_argument("--field", default="content", help="StreamField to render.")
+        parser.add_argument("--repeat", type=int, default=20, help="Renders per variant.")
+
+    def handle(self, *args, page_id, field, repeat, **options):
+        page = Page.objects.filter(pk=page_id).first()
+        if page is None:
+            raise CommandError(f"Page {page_id} does not exist.")
+        page = page.specific
+        stream = getattr(page, field, None)
+        if stream is None:
+            raise CommandError(f"{type(page).__name__} has no {field!r} field.")
+
+        request = RequestFactory().get(page.url or "/")
+        context = {"page": page, "self": page, "request": request, "csrf_token": "benchmark"}
+
+        def render():
+            start = time.perf_counter()
+            for child in stream:
+                child.render_as_block(context)
+            return time.perf_counter() - start
+
+        self.stdout.write(f"{len(stream)} blocks, {repeat} renders per variant")
+        with override_settings(BLOCK_RENDER_CACHE=False):
+            self.report("uncached", [render() for _ in range(repeat)])
+        self.report("cold", [render()])
+        self.report("warm", [render() for _ in range(repeat)])
+        self.stdout.write(f"cache stats: {stats.snapshot().get('block_render', {})}")
+
+    def report(self, name, timings):
+        mean = sum(timings) / len(timings) * 1000
+        self.stdout.write(f"{name:<9} {mean:>8.2f} ms/page")
@@ -0,0 +1,119 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from mysite.db_routers import use_primary
+
+SOURCE_ALIAS = "sqlite_source"
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy all data from the old SQLite database into the configured default "
+        "database (e.g. PostgreSQL). Run `migrate` on the target first; both "
+        "databases must be at the same migration state. Existing rows in the "
+        "target are removed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Path to the SQLite file to copy from.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000, help="Rows copied per batch."
+        )
+        parser.add_argument(
+            "--noinput", action="store_false", dest="interactive",
+            help="Don't ask before emptying the target database.",
+        )
+
+    @use_primary()
+    def handle(self, *args, source, chunk_size, interactive, **options):
+        target = connections[DEFAULT_DB_ALIAS]
+        if target.vendor == "sqlite":
+            raise CommandError("The default database is SQLite; set DATABASE_ENGINE=postgres.")
+        if interactive and input(
+            f"This empties {target.settings_dict['NAME']} before copying. Continue? [y/N] "
+        ).lower() != "y":
+            raise CommandError("Cancelled.")
+
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings(
+            {
+                **connections.settings,
+                SOURCE_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": source},
+            }
+        )[SOURCE_ALIAS]
+        source_connection = connections[SOURCE_ALIAS]
+        source_tables = set(source_connection.introspection.table_names())
+
+        models = [
+            model
+            for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+            and model._meta.db_table in source_tables
+        ]
+
+        start = time.perf_counter()
+        total = 0
+        # Django creates PostgreSQL foreign keys as DEFERRABLE INITIALLY
+        # DEFERRED, so tables can be copied in any order inside one transaction.
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            with target.cursor() as cursor:
+                for sql in target.ops.sql_flush(
+                    no_style(),
+                    [model._meta.db_table for model in models],
+                    allow_cascade=True,
+                ):
+                    cursor.execute(sql)
+
+                for model in models:
+                    copied = self.copy_table(model, source_connection, cursor, chunk_size)
+                    total += copied
+                    self.stdout.write(f"{model._meta.db_table}: {copied} rows")
+
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Copied {total} rows in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} rows/s)."
+            )
+        )
+
+    def copy_table(self, model, source_connection, target_cursor, chunk_size):
+        columns = [field.column for field in model._meta.local_concrete_fields]
+        quote = source_connection.ops.quote_name
+        table = model._meta.db_table
+        select = f"SELECT {', '.join(map(quote, columns))} FROM {quote(table)}"
+
+        target_quote = connections[DEFAULT_DB_ALIAS].ops.quote_name
+        insert = "INSERT INTO {} ({}) VALUES ({})".format(
+            target_quote(table),
+            ", ".join(map(target_quote, columns)),
+            ", ".join(["%s"] * len(columns)),
+        )
+        converters = [
+            (i, field)
+            for i, field in enumerate(model._meta.local_concrete_fields)
+            if field.get_internal_type() == "BooleanField"
+        ]
+
+        copied = 0
+        with source_connection.cursor() as source_cursor:
+            source_cursor.execute(select)
+            while rows := source_cursor.fetchmany(chunk_size):
+                if converters:
+                    rows = [self.convert(row, converters) for row in rows]
+                target_cursor.executemany(insert, rows)
+                copied += len(rows)
+        return copied
+
+    def convert(self, row, converters):
+        # SQLite stores booleans as 0/1; PostgreSQL wants real booleans.
+        row = list(row)
+        for i, field in converters:
+            if row[i] is not None:
+                row[i] = bool(row[i])
+        return row
@@ -0,0 +1,66 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from wagtail.models import Page
+
+from core.renditions import generate_renditions, missing_renditions, page_rendition_requests
+from mysite.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = "Generate the image renditions used by live pages ahead of time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Number of worker processes."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=200, help="Pages inspected per batch."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what is missing."
+        )
+
+    @use_primary()
+    def handle(self, *args, workers, batch_size, dry_run, **options):
+        # Renditions that already exist are skipped, so an interrupted run
+        # resumes where it stopped when started again.
+        pages = Page.objects.live().specific().iterator(chunk_size=batch_size)
+        missing = missing_renditions(page_rendition_requests(pages))
+        total = sum(len(specs) for specs in missing.values())
+        self.stdout.write(f"{total} missing renditions across {len(missing)} images.")
+        if dry_run or not total:
+            return
+
+        timings = defaultdict(list)
+        failures = 0
+        done = 0
+        start = time.perf_counter()
+
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(generate_renditions, image_id, specs): image_id
+                for image_id, specs in missing.items()
+            }
+            for future in as_completed(futures):
+                for spec, seconds, error in future.result():
+                    done += 1
+                    if error:
+                        failures += 1
+                        self.stderr.write(f"Image {futures[future]} {spec}: {error}")
+                    else:
+                        timings[spec].append(seconds)
+                self.stdout.write(f"\r{done}/{total}", ending="")
+
+        self.stdout.write("")
+        self.stdout.write(f"Done in {time.perf_counter() - start:.1f}s, {failures} failed.")
+        for spec, values in sorted(timings.items()):
+            self.stdout.write(
+                f"  {spec:<20} n={len(values):<6} "
+                f"mean={sum(values) / len(values):.3f}s max={max(values):.3f}s"
+            )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from wagtail.models import Page
+
+from mysite.db_routers import use_primary
+from streams.api import cached_stream_fields, precompute
+
+
+class Command(BaseCommand):
+    help = "Store the API representation of StreamFields for every live page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=200, help="Pages loaded per batch."
+        )
+
+    @use_primary()
+    def handle(self, *args, chunk_size, **options):
+        start = time.perf_counter()
+        total = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                Page.objects.live().filter(pk__gt=last_pk).order_by("pk").specific()[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            for page in chunk:
+                if cached_stream_fields(type(page)):
+                    precompute(page)
+                    total += 1
+            self.stdout.write(f"\r{total} pages", ending="")
+
+        self.stdout.write("")
+        self.stdout.write(
+            self.style.SUCCESS(f"Precomputed {total} pages in {time.perf_counter() - start:.1f}s.")
+        )
@@ -0,0 +1,50 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import class_is_indexed
+
+from mysite.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index entries of all pages in chunks. Unlike "
+        "update_index, only one chunk of pages is held in memory at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=200, help="Pages indexed per batch."
+        )
+
+    @use_primary()
+    def handle(self, *args, chunk_size, **options):
+        backend = get_search_backend()
+        start = time.perf_counter()
+        total = 0
+        last_pk = 0
+        while True:
+            # Keyset over primary keys keeps each batch query cheap.
+            chunk = list(
+                Page.objects.filter(pk__gt=last_pk).order_by("pk").specific()[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            by_model = defaultdict(list)
+            for page in chunk:
+                if class_is_indexed(type(page)):
+                    by_model[type(page)].append(page)
+            for model, pages in by_model.items():
+                backend.add_bulk(model, pages)
+                total += len(pages)
+            self.stdout.write(f"\r{total} pages indexed", ending="")
+
+        self.stdout.write("")
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {total} pages in {time.perf_counter() - start:.1f}s.")
+        )
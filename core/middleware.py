@@ -0,0 +1,173 @@
+"""Request middleware: database pinning and the anonymous page cache."""
+import hashlib
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from wagtail.views import serve
+
+from mysite.db_routers import use_primary
+
+from .cache import get_versions, stats
+
+NAMESPACE = "page_cache"
+
+
+def page_cache_key(request):
+    """Return the cache key for ``request``, or ``None`` if it mustn't be cached.
+
+    Only query parameters listed in ``PAGE_CACHE_QUERY_PARAMS`` are part of
+    the key; requests carrying any other parameter are served uncached since
+    we can't tell whether a routable page depends on it.
+    """
+    allowed = getattr(settings, "PAGE_CACHE_QUERY_PARAMS", ())
+    if any(param not in allowed for param in request.GET):
+        return None
+    params = "&".join(
+        f"{param}={value}"
+        for param in sorted(request.GET)
+        for value in request.GET.getlist(param)
+    )
+    raw = f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+    return f"{NAMESPACE}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def add_cache_tags(request, *tags):
+    """Record tags the response for ``request`` depends on.
+
+    Versions are read here, before rendering, so a publish that lands while
+    the page renders still invalidates the entry we are about to store.
+    """
+    if getattr(request, "_page_cache_key", None):
+        request._page_cache_tags.update(get_versions(tags))
+
+
+def skip_page_cache(request):
+    """Mark the current response as not cacheable."""
+    request._page_cache_key = None
+
+
+class PageCacheMiddleware:
+    """Serve anonymous GET/HEAD page requests from the cache.
+
+    Each entry remembers the versions of the tags it was rendered with (see
+    :mod:`core.cache`); bumping any of them turns the entry into a miss.
+    Responses carry an ``ETag`` and ``no-cache`` so browsers revalidate on
+    every visit, which is answered with a 304 before anything is rendered.
+
+    Pages that are rendered are read from the primary: the render fills this
+    cache and the fragment caches under versions that may have just been
+    bumped, which a replica may not have caught up with.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = getattr(settings, "PAGE_CACHE_TIMEOUT", 600)
+
+    def __call__(self, request):
+        with ExitStack() as request._page_cache_render:
+            response = self.get_response(request)
+        return self.store(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if view_func is not serve or not self.is_cacheable_request(request):
+            return None
+
+        key = page_cache_key(request)
+        if key is None:
+            self.render_from_primary(request)
+            return None
+        request._page_cache_key = key
+        request._page_cache_tags = {}
+
+        entry = cache.get(key)
+        if entry is None or get_versions(entry["tags"]) != entry["versions"]:
+            stats.record(NAMESPACE, "misses")
+            self.render_from_primary(request)
+            return None
+
+        stats.record(NAMESPACE, "hits")
+        last_modified = entry.get("last_modified")
+        response = get_conditional_response(
+            request, etag=entry["etag"], last_modified=last_modified
+        )
+        if response is None:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, public=True, no_cache=True)
+        request._page_cache_key = None
+        return response
+
+    def render_from_primary(self, request):
+        """Read from the primary until the response leaves this middleware."""
+        request._page_cache_render.enter_context(use_primary())
+
+    def is_cacheable_request(self, request):
+        return (
+            request.method in ("GET", "HEAD")
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and not getattr(request, "is_preview", False)
+        )
+
+    def store(self, request, response):
+        key = getattr(request, "_page_cache_key", None)
+        if (
+            key is None
+            or not request._page_cache_tags
+            or response.status_code != 200
+            or response.streaming
+            or response.cookies
+            or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            or "private" in response.get("Cache-Control", "")
+        ):
+            return response
+
+        versions = request._page_cache_tags
+        etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+        cache.set(
+            key,
+            {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "etag": etag,
+                "last_modified": parse_http_date_safe(response.get("Last-Modified", "")),
+                "tags": list(versions),
+                "versions": versions,
+            },
+            self.timeout,
+        )
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class PrimaryDatabaseMiddleware:
+    """Pin requests that write, or must read their own writes, to the primary.
+
+    That covers unsafe methods, the Wagtail and Django admins, and anyone
+    with a session (logged-in users, form submitters). Everything else may
+    read from a replica via mysite.db_routers.PrimaryReplicaRouter.
+    """
+
+    PRIMARY_PATH_PREFIXES = ("/admin/", "/django-admin/")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.needs_primary(request):
+            with use_primary():
+                return self.get_response(request)
+        return self.get_response(request)
+
+    def needs_primary(self, request):
+        return (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            or request.path.startswith(self.PRIMARY_PATH_PREFIXES)
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        )
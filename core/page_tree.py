@@ -0,0 +1,190 @@
+"""Create many pages under one parent without treebeard's per-node ``add_child``.
+
+``add_child`` locks the tree, reads the last sibling and saves each page on
+its own (plus a revision, reference index and search index update per
+page). ``bulk_add_children`` does the same work once per batch: paths are
+allocated in one pass after locking the parent, every table of the page
+types is written with multi-row inserts, initial revisions are created
+together, and ``pages_published`` is sent once for the batch instead of
+``page_published`` once per page.
+
+Only in-memory child relations and parental many-to-many values one level
+deep are saved (e.g. a post's authors, tags and categories). No log entries
+are written.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import NotSupportedError, connections, router, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.text import slugify
+from modelcluster.models import get_all_child_m2m_relations, get_all_child_relations
+from treebeard.exceptions import PathOverflow
+from wagtail.models import Page, ReferenceIndex, Revision
+from wagtail.search.backends import get_search_backends
+from wagtail.search.index import class_is_indexed
+
+# Sent once per bulk_add_children call with ``parent`` and the new pages as
+# ``instances``, after the live ones are published. Receivers that handle
+# ``page_published`` should usually handle this too.
+pages_published = Signal()
+
+
+def _allocate_paths(parent, pages, using):
+    last_child = parent.get_children().using(using).last()
+    step = Page._str2int(last_child.path[-Page.steplen:]) + 1 if last_child else 1
+    if step + len(pages) - 1 >= len(Page.alphabet) ** Page.steplen:
+        raise PathOverflow(f"{parent} cannot have {len(pages)} more children")
+    depth = parent.depth + 1
+    for offset, page in enumerate(pages):
+        page.path = Page._get_path(parent.path, depth, step + offset)
+        page.depth = depth
+        page.numchild = 0
+
+
+def _prepare(parent, pages, using):
+    """Fill in what ``Page.full_clean``/``save`` would, checking slugs in bulk."""
+    allow_unicode = getattr(settings, "WAGTAIL_ALLOW_UNICODE_SLUGS", True)
+    now = timezone.now()
+    for page in pages:
+        if not page.slug:
+            page.slug = slugify(page.title, allow_unicode=allow_unicode)
+        page.draft_title = page.title
+        page.set_url_path(parent)
+        if not page.locale_id:
+            page.locale_id = parent.locale_id
+        if page.live:
+            page.has_unpublished_changes = False
+            page.first_published_at = page.first_published_at or now
+            page.last_published_at = page.last_published_at or page.first_published_at
+
+    slugs = [page.slug for page in pages]
+    duplicates = {slug for slug in slugs if slugs.count(slug) > 1}
+    duplicates.update(
+        parent.get_children().using(using).filter(slug__in=slugs).values_list("slug", flat=True)
+    )
+    if duplicates:
+        raise ValidationError(
+            {"slug": f"Slugs already in use under {parent}: {', '.join(sorted(duplicates))}"}
+        )
+
+
+def _insert_rows(pages, using):
+    """Write the base ``Page`` rows, then each table of the specific types."""
+    Page.objects.using(using).bulk_create(pages)
+
+    by_model = defaultdict(list)
+    for page in pages:
+        by_model[type(page)].append(page)
+    tables = defaultdict(list)
+    for model, objs in by_model.items():
+        for table in [model, *model._meta.get_parent_list()]:
+            if table is not Page and not table._meta.abstract:
+                tables[table].extend(objs)
+
+    connection = connections[using]
+    # Parents before children: a table's parent link must exist first.
+    for table in sorted(tables, key=lambda model: len(model._meta.get_parent_list())):
+        objs = tables[table]
+        for link in table._meta.parents.values():
+            for page in objs:
+                # ``pk`` of a subclass is its own parent link, unset so far.
+                setattr(page, link.attname, page.id)
+        fields = table._meta.local_concrete_fields
+        batch_size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+        for start in range(0, len(objs), batch_size):
+            # bulk_create() refuses multi-table models; this is what it uses
+            # for each single table.
+            table._base_manager._insert(objs[start:start + batch_size], fields=fields, using=using)
+
+
+def _insert_relations(pages, using):
+    """Save the in-memory child objects and m2m values of every page."""
+    children = defaultdict(list)
+    through_rows = defaultdict(list)
+    for page in pages:
+        model = type(page)
+        for relation in get_all_child_relations(model):
+            for child in getattr(page, relation.get_accessor_name()).all():
+                setattr(child, relation.field.attname, page.pk)
+                children[relation.related_model].append(child)
+        for field in get_all_child_m2m_relations(model):
+            through = field.remote_field.through
+            for obj in getattr(page, field.name).all():
+                through_rows[through].append(through(**{
+                    f"{field.m2m_field_name()}_id": page.pk,
+                    f"{field.m2m_reverse_field_name()}_id": obj.pk,
+                }))
+    for model, objs in [*children.items(), *through_rows.items()]:
+        model._default_manager.using(using).bulk_create(objs)
+
+
+def _create_revisions(pages, user, using):
+    now = timezone.now()
+    revisions = [
+        Revision(
+            content_type_id=page.content_type_id,
+            base_content_type_id=page.get_base_content_type().pk,
+            object_id=str(page.pk),
+            user=user,
+            created_at=now,
+            content=page.serializable_data(),
+            object_str=str(page),
+        )
+        for page in pages
+    ]
+    Revision.objects.using(using).bulk_create(revisions)
+    for page, revision in zip(pages, revisions):
+        page.latest_revision = revision
+        page.latest_revision_created_at = now
+        if page.live:
+            page.live_revision = revision
+    Page.objects.using(using).bulk_update(
+        pages, ["latest_revision", "latest_revision_created_at", "live_revision"]
+    )
+
+
+def _update_search_index(pages):
+    by_model = defaultdict(list)
+    for page in pages:
+        if class_is_indexed(type(page)):
+            by_model[type(page)].append(page)
+    for backend in get_search_backends(with_auto_update=True):
+        for model, objs in by_model.items():
+            backend.add_bulk(model, objs)
+
+
+def bulk_add_children(parent, pages, user=None):
+    """Add unsaved ``pages`` as the last children of ``parent``; return them.
+
+    ``pages`` are specific page instances (any mix of types). Live pages get
+    a live revision and are announced with ``pages_published``.
+    """
+    pages = list(pages)
+    if not pages:
+        return pages
+    using = router.db_for_write(Page)
+    if not connections[using].features.can_return_rows_from_bulk_insert:
+        raise NotSupportedError("bulk_add_children needs INSERT ... RETURNING")
+
+    with transaction.atomic(using=using):
+        # Serializes concurrent inserts under this parent, like add_child.
+        parent = Page.objects.using(using).select_for_update().get(pk=parent.pk)
+        # Read from the locked alias: a replica may not have the last child yet.
+        _allocate_paths(parent, pages, using)
+        _prepare(parent, pages, using)
+        _insert_rows(pages, using)
+        Page.objects.using(using).filter(pk=parent.pk).update(numchild=F("numchild") + len(pages))
+        _insert_relations(pages, using)
+        _create_revisions(pages, user, using)
+        for page in pages:
+            ReferenceIndex.create_or_update_for_object(page)
+        transaction.on_commit(lambda: _update_search_index(pages), using=using)
+
+        live = [page for page in pages if page.live]
+        if live:
+            pages_published.send(sender=parent.specific_class, parent=parent, instances=live)
+    return pages
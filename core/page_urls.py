@@ -0,0 +1,152 @@
+"""Site-wide index of page URLs held in the shared cache.
+
+``page.url`` works out the site root paths and reverses ``wagtail_serve`` on
+every call. The index stores the URL parts of each page (plus whether it is
+live and public) under one cache key per page, so any number of pages can be
+resolved with a single ``get_many``. Entries are refreshed by core.signals
+when pages are published, unpublished or deleted.
+
+Moving or renaming a page changes the URL of its whole subtree, so
+core.signals bumps ``INDEX_TAG`` instead: every entry is rebuilt on its next
+lookup, and caches holding rendered URLs (pages, blocks, feeds) carry the
+tag as well.
+"""
+from types import SimpleNamespace
+from typing import NamedTuple
+
+from django.core.cache import cache
+from wagtail.models import Page, PageViewRestriction, Site
+
+from mysite.db_routers import use_primary
+
+from .cache import get_version
+
+INDEX_TAG = "page_urls"
+ENTRY_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class PageURL(NamedTuple):
+    site_id: int
+    root_url: str
+    path: str
+    live: bool
+    public: bool
+
+
+def _keys(page_ids):
+    version = get_version(INDEX_TAG)
+    return {pk: f"page_url:{version}:{pk}" for pk in page_ids}
+
+
+def build_entries(pages):
+    """Compute ``{page_id: PageURL}`` for ``pages`` without touching the cache."""
+    restricted_paths = list(PageViewRestriction.objects.values_list("page__path", flat=True))
+    # Wagtail caches site root paths (and the request's site) on whatever
+    # object is passed as ``request``; share one lookup between all pages.
+    # No current site, as for ``request=None``.
+    root_paths_holder = SimpleNamespace(
+        _wagtail_cached_site_root_paths=Site.get_site_root_paths(),
+        _wagtail_site=None,
+    )
+    entries = {}
+    for page in pages:
+        url_parts = page.get_url_parts(request=root_paths_holder)
+        if url_parts is None or url_parts[2] is None:
+            entries[page.pk] = None
+            continue
+        site_id, root_url, path = url_parts
+        entries[page.pk] = PageURL(
+            site_id,
+            root_url,
+            path,
+            page.live,
+            not any(page.path.startswith(p) for p in restricted_paths),
+        )
+    return entries
+
+
+def get_entries(page_ids):
+    """Return ``{page_id: PageURL or None}``, filling the index for misses."""
+    keys = _keys(set(page_ids))
+    found = cache.get_many(keys.values())
+    entries = {pk: found[key] for pk, key in keys.items() if key in found}
+
+    missing = [pk for pk in keys if pk not in entries]
+    if missing:
+        with use_primary():
+            built = build_entries(Page.objects.filter(pk__in=missing))
+        built.update({pk: None for pk in missing if pk not in built})
+        cache.set_many({keys[pk]: entry for pk, entry in built.items()}, ENTRY_TIMEOUT)
+        entries.update(built)
+    return entries
+
+
+def _site_info(request):
+    current_site = Site.find_for_request(request) if request else None
+    sites = getattr(request, "_page_urls_num_sites", None)
+    if sites is None:
+        sites = len({srp.site_id for srp in Site.get_site_root_paths()})
+        if request is not None:
+            request._page_urls_num_sites = sites
+    return current_site, sites
+
+
+def resolve_urls(page_ids, request=None, live_only=False):
+    """Return ``{page_id: url}`` for many pages at once.
+
+    URLs are relative when the page is on the current (or only) site, like
+    ``Page.get_url``. Unroutable pages, and non-live ones when ``live_only``
+    is set, map to ``None``.
+    """
+    current_site, num_sites = _site_info(request)
+    urls = {}
+    for pk, entry in get_entries(page_ids).items():
+        if entry is None or (live_only and not entry.live):
+            urls[pk] = None
+        elif num_sites == 1 or (current_site and entry.site_id == current_site.pk):
+            urls[pk] = entry.path
+        else:
+            urls[pk] = entry.root_url + entry.path
+    return urls
+
+
+def resolve_full_urls(page_ids):
+    """Return ``{page_id: absolute url}`` for many pages, like ``Page.full_url``."""
+    return {
+        pk: entry.root_url + entry.path if entry else None
+        for pk, entry in get_entries(page_ids).items()
+    }
+
+
+def resolve_url(page, request=None):
+    """URL of a single page (or page ID) through the index."""
+    pk = getattr(page, "pk", page)
+    return resolve_urls([pk], request)[pk]
+
+
+def live_url(page):
+    """URL of ``page`` if it is live, else ``None``.
+
+    Reuses ``page.resolved_url`` when a batch lookup (see streams.prefetch)
+    already set it, and stores it there otherwise.
+    """
+    if not hasattr(page, "resolved_url"):
+        page.resolved_url = resolve_urls([page.pk], live_only=True)[page.pk]
+    return page.resolved_url
+
+
+def refresh(pages):
+    """Recompute and store the entries of ``pages``."""
+    with use_primary():
+        entries = build_entries(pages)
+    keys = _keys(entries)
+    cache.set_many({keys[pk]: entry for pk, entry in entries.items()}, ENTRY_TIMEOUT)
+
+
+def refresh_subtree(page):
+    """Recompute ``page`` and all its descendants, e.g. after a move."""
+    refresh(Page.objects.descendant_of(page, inclusive=True).iterator())
+
+
+def forget(page_ids):
+    cache.delete_many(_keys(page_ids).values())
@@ -0,0 +1,48 @@
+"""Compact and streaming output for the API.
+
+``MessagePackRenderer`` is only offered when the optional ``msgpack``
+package is installed. ``stream_json`` writes a listing item by item so a
+large response is never held in memory as a whole.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Dates, decimals, UUIDs and lazy strings the same way as in JSON.
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
+
+
+def available_renderers():
+    return [MessagePackRenderer] if msgpack is not None else []
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+
+
+def stream_json(items, meta):
+    """Yield ``{"items": [...], "meta": {...}}`` one item at a time.
+
+    ``meta`` is a callable, evaluated after the last item so it can report
+    what the iteration found (e.g. the next cursor).
+    """
+    yield '{"items": ['
+    for i, item in enumerate(items):
+        yield ("," if i else "") + _dumps(item)
+    yield '], "meta": ' + _dumps(meta()) + "}"
@@ -0,0 +1,112 @@
+"""Generate image renditions before a visitor request needs them.
+
+Pages describe the renditions their templates use through
+``get_rendition_requests()`` (see ``streams.prefetch.StreamPrefetchMixin``).
+Missing ones are generated either by the ``generate_renditions`` management
+command, in a process pool, or in a small background thread pool when a
+page is published and ``RENDITION_PREGENERATE_ON_PUBLISH`` is set.
+"""
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from wagtail.images import get_image_model
+
+from mysite.db_routers import use_primary
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK_SIZE = 500
+
+
+def page_rendition_requests(pages):
+    """Return ``{image_id: {filter_spec, ...}}`` for the given pages."""
+    requests = defaultdict(set)
+    for page in pages:
+        get_requests = getattr(page, "get_rendition_requests", None)
+        if get_requests is None:
+            continue
+        for image_id, spec in get_requests():
+            requests[image_id].add(spec)
+    return requests
+
+
+def missing_renditions(requests):
+    """Filter ``requests`` down to the renditions that don't exist yet."""
+    rendition_model = get_image_model().get_rendition_model()
+    image_ids = list(requests)
+    existing = set()
+    # Chunked: SQLite limits the number of parameters per query.
+    for start in range(0, len(image_ids), LOOKUP_CHUNK_SIZE):
+        existing.update(
+            rendition_model.objects.filter(
+                image_id__in=image_ids[start:start + LOOKUP_CHUNK_SIZE]
+            ).values_list("image_id", "filter_spec")
+        )
+    missing = {}
+    for image_id, specs in requests.items():
+        specs = {spec for spec in specs if (image_id, spec) not in existing}
+        if specs:
+            missing[image_id] = sorted(specs)
+    return missing
+
+
+@use_primary()
+def generate_renditions(image_id, specs):
+    """Generate ``specs`` for one image; return ``[(spec, seconds, error)]``.
+
+    Runs right after the publish that needs the renditions, so it reads
+    from the primary.
+    """
+    close_old_connections()
+    results = []
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+    except get_image_model().DoesNotExist:
+        return [(spec, 0.0, "image does not exist") for spec in specs]
+
+    for spec in specs:
+        start = time.perf_counter()
+        try:
+            image.get_rendition(spec)
+            error = None
+        except Exception as e:  # noqa: BLE001 - reported back to the caller
+            error = f"{type(e).__name__}: {e}"
+        results.append((spec, time.perf_counter() - start, error))
+    return results
+
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "RENDITION_BACKGROUND_WORKERS", 2),
+            thread_name_prefix="renditions",
+        )
+    return _executor
+
+
+def _generate_in_background(missing):
+    for image_id, specs in missing.items():
+        for spec, seconds, error in generate_renditions(image_id, specs):
+            if error:
+                logger.warning("Rendition %s of image %s failed: %s", spec, image_id, error)
+    close_old_connections()
+
+
+def pregenerate_for_page(page):
+    """Queue the missing renditions of ``page`` once the transaction commits."""
+    pregenerate_for_pages([page.specific])
+
+
+def pregenerate_for_pages(pages):
+    """Like ``pregenerate_for_page`` for many specific pages, with one lookup."""
+    missing = missing_renditions(page_rendition_requests(pages))
+    if missing:
+        transaction.on_commit(lambda: _get_executor().submit(_generate_in_background, missing))
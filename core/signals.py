@@ -0,0 +1,139 @@
+"""Keep page and API caches, the page URL index and renditions in step with content changes."""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, ReferenceIndex, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from . import page_urls
+from .api import api_tag
+from .cache import bump
+from .page_tree import pages_published
+from .renditions import pregenerate_for_page, pregenerate_for_pages
+
+NAMESPACE = "page_cache"
+
+
+def referring_page_ids(instance):
+    """IDs of pages whose content references ``instance``."""
+    return [
+        int(pk)
+        for pk in ReferenceIndex.get_references_to(instance)
+        .filter(base_content_type=ContentType.objects.get_for_model(Page))
+        .values_list("object_id", flat=True)
+    ]
+
+
+def page_tags(page_ids):
+    return [f"page:{pk}" for pk in page_ids]
+
+
+def page_changed(sender, instance, **kwargs):
+    if not isinstance(instance, Page):
+        return
+    # The parent usually lists its children, and other pages may link here
+    # through chooser blocks or rich text.
+    page_ids = {instance.pk, *referring_page_ids(instance)}
+    parent_path = instance.path[: -instance.steplen]
+    if parent_path:
+        page_ids.update(Page.objects.filter(path=parent_path).values_list("pk", flat=True))
+    bump(*page_tags(page_ids), api_tag("pages"), namespace=NAMESPACE)
+
+
+def pages_added(sender, parent, instances, **kwargs):
+    bump(
+        *page_tags([parent.pk, *(page.pk for page in instances)]),
+        api_tag("pages"),
+        namespace=NAMESPACE,
+    )
+    page_urls.refresh(instances)
+    if getattr(settings, "RENDITION_PREGENERATE_ON_PUBLISH", False):
+        pregenerate_for_pages(instances)
+
+
+def page_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    page_changed(sender, instance)
+    bump(*page_tags([parent_page_before.pk, parent_page_after.pk]), namespace=NAMESPACE)
+
+
+def generate_page_renditions(sender, instance, **kwargs):
+    if getattr(settings, "RENDITION_PREGENERATE_ON_PUBLISH", False):
+        pregenerate_for_page(instance)
+
+
+def refresh_page_url(sender, instance, **kwargs):
+    page_urls.refresh([instance])
+
+
+def urls_changed(sender, instance, **kwargs):
+    # Every URL under ``instance`` changed, and any page, preview, feed or API
+    # response may link to one of them; they all depend on the index tag.
+    bump(page_urls.INDEX_TAG, api_tag("pages"), namespace="page_urls")
+
+
+def forget_page_url(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        page_urls.forget([instance.pk])
+
+
+def restriction_changed(sender, instance, **kwargs):
+    page_urls.refresh_subtree(instance.page)
+    bump(api_tag("pages"), namespace="api")
+
+
+def sites_changed(sender, instance, **kwargs):
+    bump(page_urls.INDEX_TAG, api_tag("pages"), namespace="page_urls")
+
+
+def image_changed(sender, instance, **kwargs):
+    bump(
+        f"image:{instance.pk}",
+        *page_tags(referring_page_ids(instance)),
+        api_tag("images"),
+        api_tag("pages"),
+        namespace=NAMESPACE,
+    )
+
+
+def document_changed(sender, instance, **kwargs):
+    bump(
+        f"document:{instance.pk}",
+        *page_tags(referring_page_ids(instance)),
+        api_tag("documents"),
+        api_tag("pages"),
+        namespace=NAMESPACE,
+    )
+
+
+def register_signal_handlers():
+    page_published.connect(page_changed)
+    page_published.connect(generate_page_renditions)
+    page_unpublished.connect(page_changed)
+    pages_published.connect(pages_added)
+    post_page_move.connect(page_moved)
+    post_delete.connect(page_changed)
+
+    page_published.connect(refresh_page_url)
+    page_unpublished.connect(refresh_page_url)
+    page_slug_changed.connect(urls_changed)
+    post_page_move.connect(urls_changed)
+    post_delete.connect(forget_page_url)
+    post_save.connect(restriction_changed, sender=PageViewRestriction)
+    post_delete.connect(restriction_changed, sender=PageViewRestriction)
+    post_save.connect(sites_changed, sender=Site)
+    post_delete.connect(sites_changed, sender=Site)
+
+    image_model = get_image_model()
+    post_save.connect(image_changed, sender=image_model)
+    post_delete.connect(image_changed, sender=image_model)
+
+    document_model = get_document_model()
+    post_save.connect(document_changed, sender=document_model)
+    post_delete.connect(document_changed, sender=document_model)
@@ -0,0 +1,97 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.core.cache import InvalidCacheBackendError, caches
+from django.templatetags.cache import CacheNode
+
+from core import cache as versioned_cache
+from core.images import get_picture
+from core.page_urls import live_url
+
+register = template.Library()
+
+
+class VersionedCacheNode(CacheNode):
+    """A ``{% cache %}`` node whose key carries a version stamp.
+
+    The fragment ``{% versioned_cache 600 blog_post_preview post.id %}``
+    depends on the tag ``blog_post_preview:<post.id>``; calling
+    ``core.cache.bump("blog_post_preview:<id>")`` invalidates it.
+    """
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        tag = ":".join([self.fragment_name, *(str(v) for v in vary_on)])
+        version = versioned_cache.get_version(tag)
+        key = make_template_fragment_key(self.fragment_name, [*vary_on, version])
+
+        fragment_cache = self.get_cache(context)
+        value = fragment_cache.get(key)
+        if value is not None:
+            versioned_cache.stats.record(self.fragment_name, "hits")
+            return value
+
+        versioned_cache.stats.record(self.fragment_name, "misses")
+        value = self.nodelist.render(context)
+        fragment_cache.set(key, value, self.get_expire_time(context))
+        return value
+
+    def get_cache(self, context):
+        if self.cache_name:
+            return caches[self.cache_name.resolve(context)]
+        try:
+            return caches["template_fragments"]
+        except InvalidCacheBackendError:
+            return caches["default"]
+
+    def get_expire_time(self, context):
+        expire_time = self.expire_time_var.resolve(context)
+        return None if expire_time is None else int(expire_time)
+
+
+@register.tag("versioned_cache")
+def do_versioned_cache(parser, token):
+    """Cache a fragment under a key that is invalidated by bumping its tag.
+
+    Usage mirrors Django's ``{% cache %}``::
+
+        {% versioned_cache 604800 blog_post_preview post.id %}
+            ...
+        {% endversioned_cache %}
+    """
+    nodelist = parser.parse(("endversioned_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "%r tag requires at least 2 arguments." % tokens[0]
+        )
+    cache_name = None
+    if len(tokens) > 3 and tokens[-1].startswith("using="):
+        cache_name = parser.compile_filter(tokens[-1].removeprefix("using="))
+        tokens = tokens[:-1]
+    return VersionedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        cache_name,
+    )
+
+
+@register.filter
+def page_url(page):
+    """URL of a live page, or ``None``; ``{{ card.button_page|page_url }}``."""
+    return live_url(page) if page else None
+
+
+@register.simple_tag
+def responsive_image(image, set_name, **attrs):
+    """Render ``image`` as a ``<picture>`` from a named rendition set.
+
+    Usage::
+
+        {% responsive_image page.banner "blog_banner" class="w-100" %}
+    """
+    if not image:
+        return ""
+    return get_picture(image, set_name, **attrs)
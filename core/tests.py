@@ -1,3 +1,556 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.template import Context, Template
+from django.test.utils import override_settings
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+from wagtail.views import serve
+
+from blog.models import (
+    ArticleBlogPage,
+    BlogAuthor,
+    BlogAuthorsOrderable,
+    BlogCategory,
+    BlogListingPage,
+    VideoBlogPage,
+)
+from mysite.db_routers import use_primary
+
+from . import api, cache_backends, images, renditions
+from .cache import bump, bump_now, get_version
+from .middleware import PageCacheMiddleware, PrimaryDatabaseMiddleware, page_cache_key
+from .page_tree import bulk_add_children, pages_published
+from .page_urls import resolve_url
+
+
+class BumpTests(TestCase):
+    def test_bump_waits_for_commit(self):
+        version = get_version("tests")
+        with self.captureOnCommitCallbacks(execute=True):
+            bump("tests")
+            # Another worker rebuilding now would still see pre-commit data.
+            self.assertEqual(get_version("tests"), version)
+        self.assertNotEqual(get_version("tests"), version)
+
+
+class MissingRenditionsTests(TestCase):
+    def test_lookup_is_chunked(self):
+        requests = {image_id: {"width-100"} for image_id in range(1, 6)}
+        with mock.patch.object(renditions, "LOOKUP_CHUNK_SIZE", 2), self.assertNumQueries(3):
+            missing = renditions.missing_renditions(requests)
+        self.assertEqual(missing, {image_id: ["width-100"] for image_id in range(1, 6)})
+
+
+@override_settings(
+    IMAGE_RENDITION_FORMATS=["webp", "jpeg"],
+    IMAGE_RENDITION_SETS={"card": {"spec": "fill-{300x200,600x400}", "sizes": "33vw"}},
+)
+class RenditionSetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=directory)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.image = get_image_model().objects.create(
+            title="Image", file=get_test_image_file(size=(1000, 800))
+        )
+
+    def test_specs_cover_every_width_and_format(self):
+        self.assertEqual(
+            sorted(images.rendition_set_specs("card")),
+            [
+                "fill-300x200|format-jpeg",
+                "fill-300x200|format-webp",
+                "fill-600x400|format-jpeg",
+                "fill-600x400|format-webp",
+            ],
+        )
+
+    def test_set_data_has_a_source_per_format_and_a_fallback(self):
+        data = images.get_rendition_set_data(self.image, "card")
+        self.assertEqual(data["sizes"], "33vw")
+        self.assertEqual([source["type"] for source in data["sources"]], ["image/webp", "image/jpeg"])
+        for source in data["sources"]:
+            self.assertIn(" 300w", source["srcset"])
+            self.assertIn(" 600w", source["srcset"])
+        self.assertTrue(data["src"].endswith(".jpg"))
+        self.assertEqual((data["width"], data["height"]), (300, 200))
+
+    def test_set_data_is_cached_until_the_image_changes(self):
+        data = images.get_rendition_set_data(self.image, "card")
+        with mock.patch.object(images, "get_picture", wraps=images.get_picture) as get_picture:
+            self.assertEqual(images.get_rendition_set_data(self.image, "card"), data)
+            self.assertEqual(get_picture.call_count, 0)
+            bump_now(f"image:{self.image.pk}")
+            images.get_rendition_set_data(self.image, "card")
+            self.assertEqual(get_picture.call_count, 1)
+
+    def test_template_tag_renders_a_picture(self):
+        html = Template(
+            '{% load core_tags %}{% responsive_image image "card" class="card-img" %}'
+        ).render(Context({"image": self.image}))
+        self.assertIn("<picture>", html)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('sizes="33vw"', html)
+        self.assertIn('class="card-img"', html)
+        self.assertEqual(Template('{% load core_tags %}{% responsive_image None "card" %}').render(Context()), "")
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """The ``replica`` alias of the test settings mirrors ``default``."""
+
+    databases = {"default", "replica"}
+
+    def test_reads_go_to_the_replica(self):
+        BlogCategory.objects.create(name="News", slug="news")
+        with self.settings(DATABASE_REPLICAS=["replica"]):
+            category = BlogCategory.objects.get(slug="news")
+            self.assertEqual(category._state.db, "replica")
+            with use_primary():
+                self.assertEqual(BlogCategory.objects.get(slug="news")._state.db, "default")
+
+    def test_reads_in_a_transaction_use_the_primary(self):
+        with self.settings(DATABASE_REPLICAS=["replica"]):
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(BlogCategory), "default")
+            self.assertEqual(router.db_for_read(BlogCategory), "replica")
+
+    def test_writes_go_to_the_primary(self):
+        with self.settings(DATABASE_REPLICAS=["replica"]):
+            category = BlogCategory.objects.create(name="News", slug="news")
+            self.assertEqual(category._state.db, "default")
+            self.assertEqual(router.db_for_write(BlogCategory), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryDatabaseMiddlewareTests(SimpleTestCase):
+    def read_database(self, request):
+        seen = []
+
+        def get_response(request):
+            seen.append(router.db_for_read(BlogCategory))
+
+        PrimaryDatabaseMiddleware(get_response)(request)
+        return seen[0]
+
+    def test_anonymous_reads_use_the_replica(self):
+        self.assertEqual(self.read_database(RequestFactory().get("/blog/")), "replica")
+
+    def test_writes_admin_and_sessions_use_the_primary(self):
+        factory = RequestFactory()
+        session = factory.get("/blog/")
+        session.COOKIES["sessionid"] = "x"
+        for request in [factory.post("/contact/"), factory.get("/admin/"), session]:
+            self.assertEqual(self.read_database(request), "default")
+
+    def test_page_renders_use_the_primary(self):
+        # A render may refill caches under versions the replica hasn't caught up with.
+        seen = []
+
+        def get_response(request):
+            middleware.process_view(request, serve, (), {})
+            seen.append(router.db_for_read(BlogCategory))
+            return HttpResponse()
+
+        middleware = PageCacheMiddleware(get_response)
+        middleware(RequestFactory().get("/blog/"))
+        self.assertEqual(seen, ["default"])
+        self.assertEqual(router.db_for_read(BlogCategory), "replica")
+
+
+@override_settings(PAGE_CACHE_QUERY_PARAMS=["tag"])
+class PageCacheKeyTests(SimpleTestCase):
+    def test_key_covers_host_path_and_allowed_params(self):
+        factory = RequestFactory()
+        key = page_cache_key(factory.get("/blog/", {"tag": "a"}))
+        self.assertEqual(page_cache_key(factory.get("/blog/?tag=a")), key)
+        self.assertNotEqual(page_cache_key(factory.get("/blog/", {"tag": "b"})), key)
+        self.assertNotEqual(page_cache_key(factory.get("/blog/")), key)
+        self.assertNotEqual(page_cache_key(factory.get("/news/", {"tag": "a"})), key)
+        other_host = factory.get("/blog/", {"tag": "a"}, HTTP_HOST="example.org")
+        with self.settings(ALLOWED_HOSTS=["*"]):
+            self.assertNotEqual(page_cache_key(other_host), key)
+
+    def test_unknown_params_are_not_cached(self):
+        self.assertIsNone(page_cache_key(RequestFactory().get("/blog/", {"utm_source": "x"})))
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        self.post = listing.add_child(
+            instance=ArticleBlogPage(title="Post", slug="post", custom_title="Before", live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save_revision().publish()
+            self.post.save_revision().publish()
+        self.url = "/blog/post/"
+
+    def change_title_silently(self):
+        # No signals, so only the cache can explain seeing the old title.
+        ArticleBlogPage.objects.filter(pk=self.post.pk).update(custom_title="After")
+
+    def test_anonymous_requests_are_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        self.assertContains(first, "Before")
+        self.change_title_silently()
+        second = self.client.get(self.url)
+        self.assertContains(second, "Before")
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+    def test_sessions_and_logged_in_users_bypass_the_cache(self):
+        self.client.get(self.url)
+        self.change_title_silently()
+
+        session_client = self.client_class()
+        session_client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+        self.assertContains(session_client.get(self.url), "After")
+        user_client = self.client_class()
+        user_client.force_login(get_user_model().objects.create_user("editor"))
+        self.assertContains(user_client.get(self.url), "After")
+
+    def test_previews_bypass_the_cache(self):
+        request = RequestFactory().get(self.url)
+        request.is_preview = True
+        middleware = PageCacheMiddleware(lambda request: HttpResponse())
+        self.assertIsNone(middleware.process_view(request, serve, (), {}))
+        self.assertIsNone(getattr(request, "_page_cache_key", None))
+
+    def test_responses_that_set_a_csrf_cookie_are_not_stored(self):
+        def get_response(request):
+            middleware.process_view(request, serve, (), {})
+            request._page_cache_tags.update({"page:1": 1})
+            get_token(request)
+            return HttpResponse("form")
+
+        middleware = PageCacheMiddleware(get_response)
+        request = RequestFactory().get(self.url)
+        middleware(request)
+        self.assertIsNone(cache.get(page_cache_key(request)))
+
+    def test_bumping_a_tag_invalidates_the_entry(self):
+        self.client.get(self.url)
+        self.change_title_silently()
+        bump_now(f"page:{self.post.pk}")
+        self.assertContains(self.client.get(self.url), "After")
+
+    def test_publishing_invalidates_the_entry(self):
+        self.client.get(self.url)
+        post = ArticleBlogPage.objects.get(pk=self.post.pk)
+        post.custom_title = "After"
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        self.assertContains(self.client.get(self.url), "After")
+
+
+class LRUStoreTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        store = cache_backends.LRUStore(2)
+        store.set("a", 1, expires_at=100)
+        store.set("b", 2, expires_at=100)
+        store.get("a", now=0)
+        store.set("c", 3, expires_at=100)
+        self.assertIsNone(store.get("b", now=0))
+        self.assertEqual(store.get("a", now=0)[1], 1)
+        self.assertEqual(len(store), 2)
+
+    def test_expired_entries_are_dropped(self):
+        store = cache_backends.LRUStore(2)
+        store.set("a", 1, expires_at=10)
+        self.assertEqual(store.get("a", now=9)[1], 1)
+        self.assertIsNone(store.get("a", now=10))
+        self.assertEqual(len(store), 0)
+
+
+class TieredCacheTests(SimpleTestCase):
+    """TieredCache in front of a file-based shared cache, as in development."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "tiered": {
+                "BACKEND": "core.cache_backends.TieredCache",
+                # Each test gets its own local tier.
+                "LOCATION": self.id(),
+                "OPTIONS": {
+                    "SHARED_CACHE": "tiered_shared",
+                    "L1_MAX_ENTRIES": 2,
+                    "L1_TIMEOUT": 5,
+                    "NEGATIVE_TIMEOUT": 60,
+                    "LOCK_TIMEOUT": 2,
+                },
+            },
+            "tiered_shared": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": directory,
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.cache = caches["tiered"]
+
+    def test_evicted_entries_are_read_from_the_shared_cache(self):
+        for key in ["a", "b", "c"]:
+            self.cache.set(key, key.upper())
+        self.assertEqual(len(self.cache.local), 2)
+        self.assertEqual(self.cache.get("a"), "A")
+
+    def test_local_entries_expire_after_l1_timeout(self):
+        now = time.monotonic()
+        with mock.patch.object(cache_backends.time, "monotonic", return_value=now):
+            self.cache.set("a", 1, timeout=600)
+            # Another worker deletes it: this one keeps its local copy.
+            self.cache.shared.delete("a")
+            self.assertEqual(self.cache.get("a"), 1)
+        with mock.patch.object(cache_backends.time, "monotonic", return_value=now + 5):
+            self.assertIsNone(self.cache.get("a"))
+
+    def test_computed_none_is_cached(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+
+        self.assertIsNone(self.cache.get_or_set("missing", compute))
+        self.assertIsNone(self.cache.get_or_set("missing", compute))
+        self.assertIsNone(self.cache.get("missing", "default"))
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        results = []
+        barrier = threading.Barrier(5)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        def worker():
+            barrier.wait()
+            results.append(caches["tiered"].get_or_set("slow", compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ["value"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_nested_get_or_set(self):
+        # e.g. blog.feeds computing a feed from the blog.taxonomy index.
+        results = []
+
+        def compute_outer():
+            return self.cache.get_or_set("inner", lambda: 1) + 1
+
+        thread = threading.Thread(
+            target=lambda: results.append(self.cache.get_or_set("outer", compute_outer))
+        )
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [2])
+        self.assertEqual(self.cache.get("inner"), 1)
+
+
+class BulkAddChildrenTests(TestCase):
+    def setUp(self):
+        self.parent = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        for slug in ("old-1", "old-2"):
+            self.parent.add_child(
+                instance=ArticleBlogPage(title=slug, slug=slug, custom_title=slug)
+            )
+        self.category = BlogCategory.objects.create(name="News", slug="news")
+        self.author = BlogAuthor.objects.create(name="Ada")
+
+    def make_pages(self):
+        pages = []
+        for i in range(4):
+            page_class = ArticleBlogPage if i % 2 else VideoBlogPage
+            extra = {"subtitle": f"Sub {i}"} if i % 2 else {"video_url": f"https://v.test/{i}"}
+            page = page_class(
+                title=f"Post {i}",
+                custom_title=f"Post {i}",
+                live=i < 3,
+                categories=[self.category],
+                blog_authors=[BlogAuthorsOrderable(author=self.author)],
+                **extra,
+            )
+            page.tags.add(f"tag-{i}", "shared")
+            pages.append(page)
+        return pages
+
+    def test_adds_pages_after_existing_children(self):
+        sent = []
+
+        def receiver(sender, **kwargs):
+            sent.append(kwargs)
+
+        pages_published.connect(receiver)
+        self.addCleanup(pages_published.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pages = bulk_add_children(self.parent, self.make_pages())
+
+        self.assertFalse(any(Page.find_problems()))
+        self.parent.refresh_from_db()
+        self.assertEqual(self.parent.numchild, 6)
+        children = list(self.parent.get_children())
+        self.assertEqual(
+            [child.slug for child in children],
+            ["old-1", "old-2", "post-0", "post-1", "post-2", "post-3"],
+        )
+        self.assertEqual(
+            [child.path for child in children],
+            [Page._get_path(self.parent.path, self.parent.depth + 1, i) for i in range(1, 7)],
+        )
+        self.assertEqual({child.depth for child in children}, {self.parent.depth + 1})
+        self.assertEqual({child.numchild for child in children}, {0})
+
+        for page in pages:
+            specific = Page.objects.get(pk=page.pk).specific
+            self.assertIs(type(specific), type(page))
+            self.assertEqual(specific.url_path, f"{self.parent.url_path}{page.slug}/")
+            if isinstance(page, ArticleBlogPage):
+                self.assertEqual(specific.subtitle, page.subtitle)
+            else:
+                self.assertEqual(specific.video_url, page.video_url)
+            self.assertEqual(
+                sorted(tag.name for tag in specific.tags.all()),
+                sorted([f"tag-{page.title[-1]}", "shared"]),
+            )
+            self.assertEqual(list(specific.categories.all()), [self.category])
+            self.assertEqual([item.author for item in specific.blog_authors.all()], [self.author])
+
+            revision = specific.latest_revision
+            self.assertEqual(revision.content["title"], page.title)
+            self.assertEqual(specific.live, page.live)
+            self.assertEqual(specific.live_revision_id, revision.pk if page.live else None)
+
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0]["parent"].pk, self.parent.pk)
+        self.assertEqual([page.pk for page in sent[0]["instances"]], [p.pk for p in pages[:3]])
+
+
+class PageURLChangeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(depth=2)
+        self.listing = home.add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        self.other_listing = home.add_child(
+            instance=BlogListingPage(title="Other", slug="other", custom_title="Other")
+        )
+        self.post = self.listing.add_child(
+            instance=ArticleBlogPage(title="Post", slug="post", custom_title="Post", live=False)
+        )
+        self.other_post = self.other_listing.add_child(
+            instance=ArticleBlogPage(title="Other", slug="other-post", custom_title="Other", live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for page in (self.listing, self.other_listing, self.post, self.other_post):
+                page.save_revision().publish()
+
+    def test_renaming_an_ancestor_changes_descendant_urls(self):
+        self.assertEqual(resolve_url(self.post.pk), "/blog/post/")
+        # A page elsewhere in the tree may link to the post.
+        etag = self.client.get("/other/other-post/")["ETag"]
+        preview = get_version(f"blog_post_preview:{self.post.pk}")
+
+        listing = Page.objects.get(pk=self.listing.pk).specific
+        listing.slug = "news"
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save_revision().publish()
+
+        self.assertEqual(resolve_url(self.post.pk), "/news/post/")
+        self.assertNotEqual(get_version(f"blog_post_preview:{self.post.pk}"), preview)
+        response = self.client.get("/other/other-post/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_moving_a_page_changes_its_url(self):
+        self.assertEqual(resolve_url(self.post.pk), "/blog/post/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.get(pk=self.post.pk).move(self.other_listing, pos="last-child")
+        self.assertEqual(resolve_url(self.post.pk), "/other/post/")
+
+
+class APICacheTests(TestCase):
+    url = "/api/v2/pages/"
+
+    def setUp(self):
+        cache.clear()
+        self.page = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+
+    def test_publishing_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save_revision().publish()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_cache_control_per_endpoint(self):
+        self.assertIn("max-age=30", self.client.get(self.url)["Cache-Control"])
+
+
+class StreamingListingTests(TestCase):
+    url = "/api/v2/pages/"
+
+    def setUp(self):
+        cache.clear()
+        listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        for i in range(5):
+            page_class = ArticleBlogPage if i % 2 else VideoBlogPage
+            listing.add_child(
+                instance=page_class(title=f"Post {i}", slug=f"post-{i}", custom_title=f"Post {i}")
+            )
+
+    def test_stream_matches_listing(self):
+        params = {"type": "blog.BlogDetailPage", "fields": "*", "limit": 4}
+        listing = self.client.get(self.url, params).json()
+
+        with mock.patch.object(api, "STREAM_CHUNK_SIZE", 2):
+            response = self.client.get(self.url, {**params, "stream": "true"})
+            streamed = json.loads(b"".join(response.streaming_content))
+
+        self.assertEqual(len(streamed["items"]), 4)
+        self.assertEqual(streamed["items"], listing["items"])
+
+        response = self.client.get(streamed["meta"]["next"])
+        rest = json.loads(b"".join(response.streaming_content))
+        everything = self.client.get(self.url, {**params, "limit": 10}).json()["items"]
+        self.assertEqual(rest["items"], everything[4:])
+        self.assertIsNone(rest["meta"]["next"])
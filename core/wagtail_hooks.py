@@ -1,6 +1,11 @@
 from django.templatetags.static import static
 from django.utils.html import format_html
 from wagtail import hooks  # Updated import
+from wagtail.models import Site
+
+from .middleware import add_cache_tags, skip_page_cache
+from .page_urls import INDEX_TAG
+
 
 @hooks.register("insert_global_admin_css", order=100)
 def global_admin_css():
@@ -18,3 +23,21 @@ def global_admin_js():
         '<script src="{}"></script>',
         static("js/custom.js")
     )
+
+
+@hooks.register("before_serve_page")
+def tag_page_cache_entry(page, request, serve_args, serve_kwargs):
+    """Tell the page cache which objects this response depends on."""
+    if page.get_view_restrictions().exists():
+        skip_page_cache(request)
+        return
+    site = Site.find_for_request(request)
+    add_cache_tags(
+        request,
+        f"page:{page.pk}",
+        # Links to other pages go out of date when one of them moves.
+        INDEX_TAG,
+        "menus",
+        f"site_settings:{site.pk if site else 0}",
+        *getattr(page, "page_cache_tags", ()),
+    )
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:42
+
+import django.db.models.deletion
+import streams.prefetch
+import streams.search
+import wagtail.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlexPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtailcore.page')),
+                ('content', wagtail.fields.StreamField([('title_and_text', 2), ('full_richtext', 3), ('simple_richtext', 4), ('cards', 12), ('cta', 17), ('button', 20), ('char_block', 21)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'help_text': 'Add your title', 'required': True}), 1: ('wagtail.blocks.TextBlock', (), {'help_text': 'Add additional text', 'required': True}), 2: ('wagtail.blocks.StructBlock', [[('title', 0), ('text', 1)]], {}), 3: ('streams.blocks.RichtextBlock', (), {}), 4: ('streams.blocks.SimpleRichtextBlock', (), {}), 5: ('wagtail.images.blocks.ImageChooserBlock', (), {'required': True}), 6: ('wagtail.blocks.CharBlock', (), {'max_length': 40, 'required': True}), 7: ('wagtail.blocks.TextBlock', (), {'max_length': 200, 'required': True}), 8: ('wagtail.blocks.PageChooserBlock', (), {'required': False}), 9: ('wagtail.blocks.URLBlock', (), {'help_text': 'If the button page above is selected, it will take precedence.', 'required': False}), 10: ('wagtail.blocks.StructBlock', [[('image', 5), ('title', 6), ('text', 7), ('button_page', 8), ('button_url', 9)]], {}), 11: ('wagtail.blocks.ListBlock', (10,), {}), 12: ('wagtail.blocks.StructBlock', [[('title', 0), ('cards', 11)]], {}), 13: ('wagtail.blocks.CharBlock', (), {'max_length': 60, 'required': True}), 14: ('wagtail.blocks.RichTextBlock', (), {'features': ['bold', 'italic'], 'required': True}), 15: ('wagtail.blocks.URLBlock', (), {'required': False}), 16: ('wagtail.blocks.CharBlock', (), {'default': 'Learn More', 'max_length': 40, 'required': True}), 17: ('wagtail.blocks.StructBlock', [[('title', 13), ('text', 14), ('button_page', 8), ('button_url', 15), ('button_text', 16)]], {}), 18: ('wagtail.blocks.PageChooserBlock', (), {'help_text': 'If selected, this URL will be used first', 'required': False}), 19: ('wagtail.blocks.URLBlock', (), {'help_text': 'If added, this URL will be used if no button page is selected', 'required': False}), 20: ('wagtail.blocks.StructBlock', [[('button_page', 18), ('button_url', 19)]], {}), 21: ('wagtail.blocks.CharBlock', (), {'help_text': 'Oh wow this is help text!!', 'max_length': 50, 'min_length': 10, 'required': True, 'template': 'streams/char_block.html'})}, null=True)),
+                ('subtitle', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+            options={
+                'verbose_name': 'Flex Page',
+                'verbose_name_plural': 'Flex Pages',
+            },
+            bases=(streams.search.SearchDocumentMixin, streams.prefetch.StreamPrefetchMixin, 'wagtailcore.page'),
+        ),
+    ]
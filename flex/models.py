@@ -2,11 +2,15 @@ from django.db import models
 from wagtail.models import Page
 from wagtail.fields import StreamField
 from wagtail.admin.panels import FieldPanel  # Updated import
+from wagtail.search import index
 from wagtail import blocks as streamfield_blocks
 
 from streams import blocks  # Assuming your custom blocks are here
+from core.images import rendition_set_specs
+from streams.prefetch import StreamPrefetchMixin
+from streams.search import SearchDocumentMixin
 
-class FlexPage(Page):
+class FlexPage(SearchDocumentMixin, StreamPrefetchMixin, Page):
     """Flexible page class."""
 
     template = "flex/flex_page.html"
@@ -38,11 +42,20 @@ class FlexPage(Page):
 
     subtitle = models.CharField(max_length=100, null=True, blank=True)
 
+    prefetch_stream_fields = ["content"]
+    search_stream_fields = ["content"]
+    prefetch_rendition_specs = rendition_set_specs("card")
+
     content_panels = Page.content_panels + [
         FieldPanel("subtitle"),
         FieldPanel("content"),  # Updated panel type
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("subtitle", boost=1.5),
+        index.SearchField("search_document"),
+    ]
+
     class Meta:  # noqa
         verbose_name = "Flex Page"
         verbose_name_plural = "Flex Pages"
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:42
+
+import django.db.models.deletion
+import modelcluster.fields
+import wagtail.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0002_create_homepage'),
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='homepage',
+            options={'verbose_name': 'Home Page', 'verbose_name_plural': 'Home Pages'},
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='banner_cta',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailcore.page'),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='banner_image',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image'),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='banner_subtitle',
+            field=wagtail.fields.RichTextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='banner_title',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='homepage',
+            name='content',
+            field=wagtail.fields.StreamField([('cta', 5)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'max_length': 60, 'required': True}), 1: ('wagtail.blocks.RichTextBlock', (), {'features': ['bold', 'italic'], 'required': True}), 2: ('wagtail.blocks.PageChooserBlock', (), {'required': False}), 3: ('wagtail.blocks.URLBlock', (), {'required': False}), 4: ('wagtail.blocks.CharBlock', (), {'default': 'Learn More', 'max_length': 40, 'required': True}), 5: ('wagtail.blocks.StructBlock', [[('title', 0), ('text', 1), ('button_page', 2), ('button_url', 3), ('button_text', 4)]], {})}, null=True),
+        ),
+        migrations.CreateModel(
+            name='HomePageCarouselImages',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sort_order', models.IntegerField(blank=True, editable=False, null=True)),
+                ('carousel_image', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image')),
+                ('page', modelcluster.fields.ParentalKey(on_delete=django.db.models.deletion.CASCADE, related_name='carousel_images', to='home.homepage')),
+            ],
+            options={
+                'ordering': ['sort_order'],
+                'abstract': False,
+            },
+        ),
+    ]
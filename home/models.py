@@ -15,10 +15,17 @@ from wagtail.admin.panels import (
 from wagtail.models import Page, Orderable
 from wagtail.fields import RichTextField, StreamField
 from wagtail.contrib.routable_page.models import RoutablePageMixin, route
+from wagtail.search import index
 
 from rest_framework.fields import Field
 
+from core.page_urls import resolve_url
 from streams import blocks
+from blog.models import ImageSerializedField
+from core.images import rendition_set_specs
+from streams.api import CachedStreamField
+from streams.prefetch import StreamPrefetchMixin
+from streams.search import SearchDocumentMixin
 
 
 class HomePageCarouselImages(Orderable):
@@ -43,11 +50,11 @@ class BannerCTASerializer(Field):
             'first_published_at': page.first_published_at,
             'owner': page.owner.username if page.owner else None,
             'slug': page.slug,
-            'url': page.url,
+            'url': resolve_url(page, self.context.get('request')),
         }
 
 
-class HomePage(RoutablePageMixin, Page):
+class HomePage(SearchDocumentMixin, StreamPrefetchMixin, RoutablePageMixin, Page):
     template = "home/home_page.html"
     subpage_types = ['blog.BlogListingPage', 'contact.ContactPage', 'flex.FlexPage']
     parent_page_type = ['wagtailcore.Page']
@@ -71,13 +78,26 @@ class HomePage(RoutablePageMixin, Page):
 
     content = StreamField([("cta", blocks.CTABlock())], null=True, blank=True)
 
+    prefetch_stream_fields = ["content"]
+    search_stream_fields = ["content"]
+
+    search_fields = Page.search_fields + [
+        index.SearchField("banner_title", boost=1.5),
+        index.SearchField("banner_subtitle"),
+        index.SearchField("search_document"),
+    ]
+
     api_fields = [
         APIField("banner_title"),
         APIField("banner_subtitle"),
         APIField("banner_image"),
+        APIField(
+            "banner_image_renditions",
+            serializer=ImageSerializedField(source="banner_image", rendition_set="home_hero"),
+        ),
         APIField("banner_cta", serializer=BannerCTASerializer()),
         APIField("carousel_images"),
-        APIField("content"),
+        APIField("content", serializer=CachedStreamField()),
         APIField("a_custom_api_response"),
     ]
 
@@ -125,3 +145,12 @@ class HomePage(RoutablePageMixin, Page):
 
     def get_admin_display_title(self):
         return "Custom Home Page Title"
+
+    def get_rendition_requests(self):
+        yield from super().get_rendition_requests()
+        if self.banner_image_id:
+            for spec in rendition_set_specs("home_hero"):
+                yield self.banner_image_id, spec
+        for item in self.carousel_images.all():
+            if item.carousel_image_id:
+                yield item.carousel_image_id, "fill-900x400"
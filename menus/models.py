@@ -1,3 +1,6 @@
+from typing import NamedTuple
+
+from django.core.cache import cache
 from django.db import models
 from django_extensions.db.fields import AutoSlugField
 from modelcluster.fields import ParentalKey
@@ -8,9 +11,15 @@ from wagtail.admin.panels import (
     FieldPanel,
     PageChooserPanel,
 )
-from wagtail.models import Orderable
+from wagtail.models import Orderable, Site
 from wagtail.snippets.models import register_snippet
 
+from core.cache import versioned_key
+from core.page_urls import resolve_url, resolve_urls
+from mysite.db_routers import use_primary
+
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 class MenuItem(Orderable):
     """Model representing an item in the menu."""
@@ -44,8 +53,8 @@ class MenuItem(Orderable):
 
     @property
     def link(self):
-        if self.link_page:
-            return self.link_page.url
+        if self.link_page_id:
+            return resolve_url(self.link_page_id) or '#'
         elif self.link_url:
             return self.link_url
         return '#'
@@ -59,6 +68,29 @@ class MenuItem(Orderable):
         return 'Missing Title'
 
 
+class MenuLink(NamedTuple):
+    """A menu item with its title and URL already resolved."""
+
+    title: str
+    link: str
+    open_in_new_tab: bool
+
+
+class MenuLinks(tuple):
+    """Tuple of links that also answers ``.all()`` like the related manager."""
+
+    def all(self):
+        return self
+
+
+class CachedMenu(NamedTuple):
+    """Immutable, cacheable snapshot of a menu."""
+
+    title: str
+    slug: str
+    menu_items: MenuLinks
+
+
 @register_snippet
 class Menu(ClusterableModel):
     """The main menu clusterable model."""
@@ -76,3 +108,47 @@ class Menu(ClusterableModel):
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def get_cached(cls, slug, request=None):
+        """Return a ``CachedMenu`` for ``slug``, or ``None`` if there is no such menu.
+
+        The snapshot is cached per site and rebuilt after menus.signals bumps
+        the ``menus`` tag.
+        """
+        site = Site.find_for_request(request) if request else None
+        key = versioned_key("menu", ["menus"], site.pk if site else 0, slug)
+        with use_primary():
+            return cache.get_or_set(
+                key, lambda: cls.build_snapshot(slug, request), MENU_CACHE_TIMEOUT
+            )
+
+    @classmethod
+    def build_snapshot(cls, slug, request=None):
+        """Build a ``CachedMenu`` with one query for the menu and its items."""
+        items = list(
+            MenuItem.objects.filter(page__slug=slug)
+            .select_related("page", "link_page")
+            .order_by("sort_order")
+        )
+        if items:
+            menu = items[0].page
+        else:
+            menu = cls.objects.filter(slug=slug).first()
+            if menu is None:
+                return None
+        urls = resolve_urls(
+            [item.link_page_id for item in items if item.link_page_id], request
+        )
+        return CachedMenu(
+            title=menu.title,
+            slug=menu.slug,
+            menu_items=MenuLinks(
+                MenuLink(
+                    title=item.title,
+                    link=(urls[item.link_page_id] or '#') if item.link_page_id else item.link,
+                    open_in_new_tab=item.open_in_new_tab,
+                )
+                for item in items
+            ),
+        )
@@ -0,0 +1,35 @@
+"""Invalidate cached menus when a menu, a page it links to, or one of its ancestors changes."""
+from django.db.models.signals import post_delete, post_save
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from core.cache import bump
+
+from .models import Menu, MenuItem
+
+NAMESPACE = "menus"
+
+
+def menu_changed(sender, instance, **kwargs):
+    bump("menus", namespace=NAMESPACE)
+
+
+def linked_page_changed(sender, instance, **kwargs):
+    if MenuItem.objects.filter(link_page_id=instance.pk).exists():
+        bump("menus", namespace=NAMESPACE)
+
+
+def linked_subtree_changed(sender, instance, **kwargs):
+    # The URL of every page under ``instance`` changed with it.
+    if MenuItem.objects.filter(link_page__path__startswith=instance.path).exists():
+        bump("menus", namespace=NAMESPACE)
+
+
+def register_signal_handlers():
+    post_save.connect(menu_changed, sender=Menu)
+    post_delete.connect(menu_changed, sender=Menu)
+    # Deleting a linked page cascades to its menu items.
+    post_delete.connect(menu_changed, sender=MenuItem)
+    page_published.connect(linked_page_changed)
+    page_unpublished.connect(linked_page_changed)
+    page_slug_changed.connect(linked_subtree_changed)
+    post_page_move.connect(linked_subtree_changed)
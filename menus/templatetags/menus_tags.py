@@ -3,6 +3,6 @@ from ..models import Menu
 
 register = template.Library()
 
-@register.simple_tag()
-def get_menu(slug):
-    return Menu.objects.filter(slug=slug).first()
+@register.simple_tag(takes_context=True)
+def get_menu(context, slug):
+    return Menu.get_cached(slug, context.get("request"))
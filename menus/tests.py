@@ -1,3 +1,48 @@
+from django.core.cache import cache
 from django.test import TestCase
+from wagtail.models import Page
 
-# Create your tests here.
+from blog.models import ArticleBlogPage, BlogListingPage
+
+from .models import Menu, MenuItem
+
+
+class CachedMenuTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(depth=2)
+        self.listing = home.add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        self.other_listing = home.add_child(
+            instance=BlogListingPage(title="Other", slug="other", custom_title="Other")
+        )
+        self.post = self.listing.add_child(
+            instance=ArticleBlogPage(title="Post", slug="post", custom_title="Post", live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for page in (self.listing, self.other_listing, self.post):
+                page.save_revision().publish()
+            menu = Menu.objects.create(title="Main", slug="main")
+            MenuItem.objects.create(page=menu, link_page=self.post, link_title="Post")
+
+    def links(self):
+        return [item.link for item in Menu.get_cached("main").menu_items]
+
+    def test_renaming_an_ancestor_of_a_linked_page(self):
+        self.assertEqual(self.links(), ["/blog/post/"])
+
+        listing = Page.objects.get(pk=self.listing.pk).specific
+        listing.slug = "news"
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save_revision().publish()
+
+        self.assertEqual(self.links(), ["/news/post/"])
+
+    def test_moving_an_ancestor_of_a_linked_page(self):
+        self.assertEqual(self.links(), ["/blog/post/"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.objects.get(pk=self.listing.pk).move(self.other_listing, pos="last-child")
+
+        self.assertEqual(self.links(), ["/other/blog/post/"])
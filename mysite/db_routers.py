@@ -0,0 +1,49 @@
+"""Route reads to replicas and writes to the primary database."""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+_use_primary = ContextVar("use_primary", default=False)
+
+
+@contextmanager
+def use_primary():
+    """Send every query in the block, reads included, to the primary."""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Read from a random replica unless the current request must see its own writes.
+
+    core.middleware.PrimaryDatabaseMiddleware pins admin requests, logged-in
+    users and unsafe methods to the primary, so only anonymous page serves
+    and API reads go to replicas. Reads inside a transaction on the primary
+    stay there too.
+
+    Anything rebuilt into a cache after a version bump (see core.cache) must
+    be read from the primary: a lagging replica would store pre-bump data
+    under the new version. Those rebuilds run under :func:`use_primary`.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _use_primary.get() or connections["default"].in_atomic_block:
+            return "default"
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any of them can relate.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -47,7 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sitemaps',
     'django.contrib.sites',
 
-    'captcha',
+    'django_recaptcha',
     'wagtailcaptcha',
     'rest_framework',
 
@@ -60,6 +60,7 @@ SITE_ID = 1
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PrimaryDatabaseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,9 +68,9 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
-    'wagtail.middleware.SiteMiddleware',
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'core.middleware.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'mysite.urls'
@@ -98,11 +99,88 @@ AUTHENTICATION_BACKENDS = [
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Database: SQLite by default; set DATABASE_ENGINE=postgres to use PostgreSQL.
+# DB_POOL enables psycopg's connection pool (Django 5.1+), which replaces
+# persistent connections, so CONN_MAX_AGE only applies without it.
+# DB_REPLICA_HOSTS is a comma-separated list of read replicas.
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3'))
+
+if os.getenv('DATABASE_ENGINE', 'sqlite') == 'postgres':
+    DB_POOL = os.getenv('DB_POOL', 'true').lower() == 'true'
+
+    def postgres_database(host):
+        database = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'blogsite'),
+            'USER': os.getenv('POSTGRES_USER', 'blogsite'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': host,
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'OPTIONS': {},
+        }
+        if DB_POOL:
+            database['OPTIONS']['pool'] = {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+            }
+        return database
+
+    DATABASES = {
+        'default': postgres_database(os.getenv('POSTGRES_HOST', 'localhost')),
     }
+    DATABASE_REPLICAS = []
+    for i, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+        alias = f'replica{i + 1}'
+        DATABASES[alias] = postgres_database(host.strip())
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+        DATABASE_REPLICAS.append(alias)
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+        }
+    }
+    DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['mysite.db_routers.PrimaryReplicaRouter']
+
+# Caching
+# "default" is a small per-worker LRU (core/cache_backends.py) in front of the
+# cache shared by all workers: Redis when REDIS_URL is set, otherwise files
+# under CACHE_DIR.
+
+if os.environ.get('REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    # Django's default of 300 files would cull version counters and per-post
+    # entries all the time on any real archive, and a culled counter
+    # invalidates everything cached under its tag.
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, '.cache')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 50000))},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED_CACHE': 'shared',
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1000)),
+            'L1_TIMEOUT': int(os.environ.get('CACHE_L1_TIMEOUT', 5)),
+            'NEGATIVE_TIMEOUT': 60,
+            'LOCK_TIMEOUT': 10,
+        },
+    },
+    'shared': {**SHARED_CACHE, 'KEY_PREFIX': 'mysite'},
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -129,6 +207,23 @@ MEDIA_URL = '/media/'
 WAGTAIL_SITE_NAME = "mysite"
 BASE_URL = 'http://example.com'
 
+# Search
+# The database backend uses PostgreSQL full-text search, or an FTS5 table on
+# SQLite; the index is updated whenever a page is saved. Result pages are
+# cached per query (see search/results.py).
+WAGTAILSEARCH_BACKENDS = {
+    'default': {
+        'BACKEND': 'wagtail.search.backends.database',
+        'SEARCH_CONFIG': 'english',
+    }
+}
+SEARCH_RESULTS_PER_PAGE = 10
+SEARCH_MAX_RESULTS = 200
+SEARCH_CACHE_TIMEOUT = 600
+# How often each worker checks whether its in-memory suggestion index
+# (search/suggest.py) is out of date, in seconds
+SUGGEST_CHECK_INTERVAL = 5
+
 RECAPTCHA_PUBLIC_KEY = os.getenv('RECAPTCHA_PUBLIC_KEY', 'your-public-key-here')
 RECAPTCHA_PRIVATE_KEY = os.getenv('RECAPTCHA_PRIVATE_KEY', 'your-private-key-here')
 NOCAPTCHA = True
@@ -149,3 +244,70 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 }
+
+# Blog listing pagination (see blog/pagination.py)
+BLOG_POSTS_PER_PAGE = 2
+# Tag and category index of live posts (see blog/taxonomy.py); the listing
+# shows the BLOG_TAG_CLOUD_SIZE most used tags
+BLOG_TAXONOMY_TIMEOUT = 60 * 60 * 24
+BLOG_TAG_CLOUD_SIZE = 30
+
+# RSS/Atom feeds of the blog listing (see blog/feeds.py). Set
+# BLOG_FEED_STATIC_ROOT to also write them there as static files on publish.
+BLOG_FEED_ITEMS = 20
+BLOG_FEED_TIMEOUT = 60 * 60 * 24
+BLOG_FEED_STATIC_ROOT = os.getenv('BLOG_FEED_STATIC_ROOT') or None
+
+# Related posts (see blog/related.py and the compute_related_posts command):
+# weight of a shared tag, category or author before scaling by its rarity;
+# features of more than RELATED_POSTS_MAX_FEATURE_POSTS posts are ignored.
+# Publishing a post adds it to the entries of its closest neighbours.
+# Entries expire after RELATED_POSTS_TIMEOUT and are recomputed on next read.
+RELATED_POSTS_COUNT = 4
+RELATED_POSTS_WEIGHTS = {"tag": 1.0, "category": 0.5, "author": 0.75}
+RELATED_POSTS_MAX_FEATURE_POSTS = 5000
+RELATED_POSTS_REFRESH_NEIGHBOURS = 200
+RELATED_POSTS_TIMEOUT = 60 * 60 * 24 * 7
+
+# Anonymous full-page cache (see core/middleware.py)
+PAGE_CACHE_TIMEOUT = 600
+PAGE_CACHE_QUERY_PARAMS = ["tag", "after", "before"]
+
+# API v2 responses are cached and validated per endpoint (see core/api.py);
+# Cache-Control options per endpoint name, passed to patch_cache_control
+API_CACHE_TIMEOUT = 600
+API_CACHE_CONTROL = {
+    "default": {"public": True, "no_cache": True},
+    "pages": {"public": True, "max_age": 30},
+    "images": {"public": True, "max_age": 300},
+    "documents": {"public": True, "max_age": 300},
+}
+# Most items a streamed pages listing (?stream=true) may return; install the
+# optional msgpack package to also offer ?format=msgpack
+API_STREAM_LIMIT_MAX = 1000
+
+# Rendered HTML of StreamField blocks with Meta.render_cache (see
+# streams/render_cache.py), in seconds
+BLOCK_RENDER_CACHE = True
+BLOCK_RENDER_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Generate missing image renditions in background threads of the web worker
+# when a page is published (see core/renditions.py). Off by default: bulk
+# imports publish hundreds of pages at once; run the generate_renditions
+# command after them, or periodically, instead.
+RENDITION_PREGENERATE_ON_PUBLISH = (
+    os.getenv('RENDITION_PREGENERATE_ON_PUBLISH', 'false').lower() == 'true'
+)
+RENDITION_BACKGROUND_WORKERS = 2
+
+# Responsive rendition sets used by the responsive_image template tag and the
+# API (see core/images.py). Add "avif" in front to also serve AVIF.
+IMAGE_RENDITION_FORMATS = ["webp", "jpeg"]
+IMAGE_RENDITION_SETS = {
+    "home_hero": {"spec": "width-{800,1600,2400,3560}", "sizes": "100vw"},
+    "blog_banner": {"spec": "fill-{600x150,1200x300,2400x600}", "sizes": "100vw"},
+    "card": {
+        "spec": "fill-{300x200,600x400}",
+        "sizes": "(min-width: 768px) 33vw, 100vw",
+    },
+}
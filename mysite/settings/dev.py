@@ -24,14 +24,6 @@ MIDDLEWARE += [
 
 INTERNAL_IPS = ("127.0.0.1", "172.17.0.1")  # For Debug Toolbar
 
-# Uncomment this line to enable template caching for production
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-#         "LOCATION": "/path/to/your/site/cache"
-#     }
-# }
-
 # Attempt to import local settings, if available
 try:
     from .local import *
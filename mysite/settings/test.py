@@ -0,0 +1,29 @@
+"""Settings for the test suite.
+
+    python manage.py test --settings=mysite.settings.test
+
+Tests run on SQLite unless DATABASE_ENGINE=postgres is set; see README.md
+for running them against the PostgreSQL stand-in in docker-compose.test.yml.
+"""
+from .base import *
+
+SECRET_KEY = 'tests-only-secret-key'
+ALLOWED_HOSTS = ['*']
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# A replica that mirrors the test database, so the router and
+# core.middleware.PrimaryDatabaseMiddleware run against a real second
+# connection. Reads only go to it in tests that set DATABASE_REPLICAS: a
+# mirror can't see what a TestCase writes inside its transaction.
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = []
+
+# Same two tiers as in production, with a shared tier that is private to the
+# test process.
+CACHES['shared'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'tests',
+}
+
+BLOG_FEED_STATIC_ROOT = None
+RENDITION_PREGENERATE_ON_PUBLISH = False
@@ -18,6 +18,7 @@ urlpatterns = [
     path('documents/', include(wagtaildocs_urls)),
 
     path('search/', search_views.search, name='search'),
+    path('search/suggest/', search_views.suggest, name='search_suggest'),
 
     path('api/v2/', api_router.urls),
 
@@ -0,0 +1,55 @@
+"""Cached site search.
+
+The ranked page IDs for a query are cached per normalized query (up to
+``SEARCH_MAX_RESULTS`` of them), so paging through a popular term costs one
+cache read plus one query for the pages shown. Cached results are dropped
+whenever search.signals bumps the ``search`` tag.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+
+from core.cache import versioned_key
+from core.page_urls import resolve_urls
+from mysite.db_routers import use_primary
+
+SEARCH_TAG = "search"
+MAX_QUERY_LENGTH = 100
+
+
+def normalize_query(query):
+    """Collapse whitespace and truncate, keeping the user's casing."""
+    return re.sub(r"\s+", " ", query or "").strip()[:MAX_QUERY_LENGTH]
+
+
+def search_page_ids(query):
+    """Ranked IDs of the live, public pages matching ``query``."""
+    digest = hashlib.md5(query.casefold().encode()).hexdigest()
+    key = versioned_key("search", [SEARCH_TAG], digest)
+    with use_primary():
+        return cache.get_or_set(
+            key,
+            lambda: _run_search(query.casefold()),
+            getattr(settings, "SEARCH_CACHE_TIMEOUT", 600),
+        )
+
+
+def _run_search(query):
+    results = get_search_backend().search(query, Page.objects.live().public())
+    return [page.pk for page in results[: getattr(settings, "SEARCH_MAX_RESULTS", 200)]]
+
+
+def load_results(page_ids, request=None):
+    """Fetch the pages for ``page_ids`` in order, with ``listing_url`` set."""
+    pages = Page.objects.in_bulk(page_ids)
+    urls = resolve_urls(pages.keys(), request)
+    results = []
+    for pk in page_ids:
+        if pk in pages:
+            pages[pk].listing_url = urls[pk]
+            results.append(pages[pk])
+    return results
@@ -0,0 +1,63 @@
+"""Keep cached search results and the suggestion index in step with content."""
+from django.db.models.signals import post_delete, post_save
+from wagtail.models import Page, PageViewRestriction
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from blog.models import BlogCategory
+from core.cache import bump
+from core.page_tree import pages_published
+
+from . import suggest
+from .results import SEARCH_TAG
+
+
+def pages_changed(sender, instance=None, **kwargs):
+    if sender is PageViewRestriction or isinstance(instance, Page):
+        bump(SEARCH_TAG, namespace="search")
+
+
+def page_published_or_unpublished(sender, instance, **kwargs):
+    suggest.page_updated(instance)
+
+
+def pages_added(sender, **kwargs):
+    bump(SEARCH_TAG, namespace="search")
+    # One rebuild per worker rather than one index update per page.
+    suggest.invalidate()
+
+
+def page_deleted(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        suggest.page_removed(instance.pk)
+
+
+def page_urls_changed(sender, **kwargs):
+    suggest.invalidate()
+
+
+def category_saved(sender, instance, **kwargs):
+    suggest.category_updated(instance)
+
+
+def category_deleted(sender, instance, **kwargs):
+    suggest.category_updated(instance, deleted=True)
+
+
+def register_signal_handlers():
+    page_published.connect(pages_changed)
+    page_unpublished.connect(pages_changed)
+    post_page_move.connect(pages_changed)
+    post_delete.connect(pages_changed)
+    post_save.connect(pages_changed, sender=PageViewRestriction)
+    post_delete.connect(pages_changed, sender=PageViewRestriction)
+
+    page_published.connect(page_published_or_unpublished)
+    pages_published.connect(pages_added)
+    page_unpublished.connect(page_published_or_unpublished)
+    post_delete.connect(page_deleted)
+    page_slug_changed.connect(page_urls_changed)
+    post_page_move.connect(page_urls_changed)
+    post_save.connect(page_urls_changed, sender=PageViewRestriction)
+    post_delete.connect(page_urls_changed, sender=PageViewRestriction)
+    post_save.connect(category_saved, sender=BlogCategory)
+    post_delete.connect(category_deleted, sender=BlogCategory)
@@ -0,0 +1,287 @@
+"""In-memory prefix index for search-as-you-type suggestions.
+
+Each worker keeps a sorted array of ``(key, source)`` pairs, where the keys
+are every word-suffix of a normalized label ("hello big world" is indexed
+under "hello big world", "big world" and "world"). A lookup is a ``bisect``
+plus a short scan, so no query runs per keystroke.
+
+The index holds live public page titles, blog categories and tags. When the
+transaction commits, the publishing worker updates its own copy in place
+(see search.signals) and bumps the ``suggest`` tag. Other workers notice the
+new version at most every ``SUGGEST_CHECK_INTERVAL`` seconds and rebuild
+theirs in a background thread, serving the old index until it is done. Only
+a worker's first lookup waits for a build.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from taggit.models import Tag
+from wagtail.models import Page
+
+from blog.models import BlogCategory, BlogListingPage, BlogPageTag
+from core.cache import bump_now, get_version
+from core.page_urls import resolve_url, resolve_urls
+from mysite.db_routers import use_primary
+
+SUGGEST_TAG = "suggest"
+KIND_ORDER = {"page": 0, "category": 1, "tag": 2}
+
+
+class Suggestion(NamedTuple):
+    label: str
+    url: str
+    kind: str
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+def index_keys(label):
+    words = normalize(label).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    def __init__(self, items=()):
+        self._items = dict(items)
+        self._keys = sorted(
+            (key, source)
+            for source, suggestion in self._items.items()
+            for key in index_keys(suggestion.label)
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def set(self, source, suggestion):
+        with self._lock:
+            self._discard(source)
+            self._items[source] = suggestion
+            for key in index_keys(suggestion.label):
+                insort(self._keys, (key, source))
+
+    def discard(self, source):
+        with self._lock:
+            self._discard(source)
+
+    def _discard(self, source):
+        old = self._items.pop(source, None)
+        if old is None:
+            return
+        for key in index_keys(old.label):
+            i = bisect_left(self._keys, (key, source))
+            if i < len(self._keys) and self._keys[i] == (key, source):
+                del self._keys[i]
+
+    def search(self, prefix, limit=8):
+        """Return up to ``limit`` suggestions whose label has a word starting with ``prefix``."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        matches = {}
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            # Scanning a bounded window keeps one-letter prefixes cheap.
+            end = min(len(self._keys), i + limit * 20)
+            while i < end and self._keys[i][0].startswith(prefix):
+                key, source = self._keys[i]
+                suggestion = self._items[source]
+                rank = (
+                    0 if normalize(suggestion.label).startswith(prefix) else 1,
+                    KIND_ORDER.get(suggestion.kind, 9),
+                    len(suggestion.label),
+                )
+                if source not in matches or rank < matches[source][0]:
+                    matches[source] = (rank, suggestion)
+                i += 1
+        return [suggestion for rank, suggestion in sorted(matches.values())[:limit]]
+
+
+def _listing_page():
+    return BlogListingPage.objects.live().first()
+
+
+def page_suggestion(page, url):
+    return Suggestion(page.title, url, "page")
+
+
+def category_suggestion(category, listing_page, listing_url):
+    return Suggestion(
+        category.name,
+        listing_url + listing_page.reverse_subpage("category_view", kwargs={"cat_slug": category.slug}),
+        "category",
+    )
+
+
+def tag_suggestion(tag, listing_url):
+    return Suggestion(tag.name, f"{listing_url}?tag={tag.slug}", "tag")
+
+
+def build_index():
+    """Load every suggestion with one query per source."""
+    items = {}
+    pages = list(Page.objects.live().public().filter(depth__gt=1).only("pk", "title"))
+    urls = resolve_urls([page.pk for page in pages])
+    for page in pages:
+        if urls[page.pk]:
+            items[("page", page.pk)] = page_suggestion(page, urls[page.pk])
+
+    listing_page = _listing_page()
+    listing_url = resolve_url(listing_page) if listing_page else None
+    if listing_url:
+        for category in BlogCategory.objects.all():
+            items[("category", category.pk)] = category_suggestion(category, listing_page, listing_url)
+        used_tags = Tag.objects.filter(
+            pk__in=BlogPageTag.objects.filter(content_object__live=True).values("tag_id")
+        )
+        for tag in used_tags:
+            items[("tag", tag.pk)] = tag_suggestion(tag, listing_url)
+    return PrefixIndex(items)
+
+
+class _State:
+    index = None
+    version = None
+    checked_at = 0.0
+    rebuilding = False
+
+
+_state = _State()
+_build_lock = threading.Lock()
+
+
+def _rebuild(version):
+    try:
+        with use_primary():
+            index = build_index()
+        with _build_lock:
+            # ``version`` was read before the build, so a change committed
+            # while it ran is caught by the next check.
+            _state.index = index
+            _state.version = version
+    finally:
+        _state.rebuilding = False
+        connections.close_all()
+
+
+def _start_rebuild(version):
+    threading.Thread(target=_rebuild, args=(version,), daemon=True).start()
+
+
+def get_index():
+    """Return this worker's index, rebuilding it if another worker changed content.
+
+    A stale index is rebuilt in the background and served meanwhile.
+    """
+    now = time.monotonic()
+    interval = getattr(settings, "SUGGEST_CHECK_INTERVAL", 5)
+    if _state.index is not None and now - _state.checked_at < interval:
+        return _state.index
+
+    version = get_version(SUGGEST_TAG)
+    _state.checked_at = now
+    if _state.index is None:
+        with _build_lock:
+            if _state.index is None:
+                with use_primary():
+                    _state.index = build_index()
+                _state.version = version
+    elif version != _state.version:
+        with _build_lock:
+            start, _state.rebuilding = not _state.rebuilding, True
+        if start:
+            _start_rebuild(version)
+    return _state.index
+
+
+def suggest(prefix, limit=8):
+    return get_index().search(prefix, limit)
+
+
+def _apply(update):
+    """Apply ``update`` to this worker's index and tell the other workers.
+
+    This worker's index only takes the new version if it was current before
+    the bump. If another worker bumped the tag meanwhile, its change isn't
+    in this index, so it is rebuilt on the next check instead.
+    """
+
+    def apply():
+        version = bump_now(SUGGEST_TAG, namespace="search")[SUGGEST_TAG]
+        with _build_lock:
+            if _state.index is None:
+                return
+            update(_state.index)
+            if _state.version is not None and version == _state.version + 1:
+                _state.version = version
+
+    transaction.on_commit(apply)
+
+
+def invalidate():
+    """Rebuild every worker's index, e.g. after a subtree changed URLs."""
+
+    def apply():
+        bump_now(SUGGEST_TAG, namespace="search")
+        # Check on the next lookup; the rebuild runs in the background.
+        _state.version = None
+        _state.checked_at = 0.0
+
+    transaction.on_commit(apply)
+
+
+def page_updated(page):
+    # Read the page itself: the URL index may not have caught up yet.
+    if page.live and not page.get_view_restrictions().exists():
+        url = page.get_url()
+    else:
+        url = None
+    listing_page = _listing_page()
+    listing_url = resolve_url(listing_page) if listing_page else None
+    tags = list(
+        Tag.objects.filter(
+            pk__in=BlogPageTag.objects.filter(content_object_id=page.pk).values("tag_id")
+        )
+    )
+    # Like build_index: tags of live posts, this one included if it is live.
+    used_tag_ids = set(
+        BlogPageTag.objects.filter(tag__in=tags, content_object__live=True).values_list(
+            "tag_id", flat=True
+        )
+    )
+
+    def update(index):
+        if url:
+            index.set(("page", page.pk), page_suggestion(page, url))
+        else:
+            index.discard(("page", page.pk))
+        for tag in tags:
+            if listing_url and tag.pk in used_tag_ids:
+                index.set(("tag", tag.pk), tag_suggestion(tag, listing_url))
+            else:
+                index.discard(("tag", tag.pk))
+
+    _apply(update)
+
+
+def page_removed(page_id):
+    _apply(lambda index: index.discard(("page", page_id)))
+
+
+def category_updated(category, deleted=False):
+    listing_page = _listing_page()
+    listing_url = resolve_url(listing_page) if listing_page else None
+
+    def update(index):
+        if deleted or not listing_url:
+            index.discard(("category", category.pk))
+        else:
+            index.set(("category", category.pk), category_suggestion(category, listing_page, listing_url))
+
+    _apply(update)
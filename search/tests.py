@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.text import slugify
+from wagtail.models import Page
+
+from blog.models import ArticleBlogPage, BlogListingPage
+from core.cache import bump_now
+
+from . import results, suggest
+
+
+@override_settings(SUGGEST_CHECK_INTERVAL=0)
+class SuggestIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        state = mock.patch.object(suggest, "_state", suggest._State())
+        state.start()
+        self.addCleanup(state.stop)
+        self.home = Page.objects.get(depth=2)
+
+    def test_stale_index_is_rebuilt_in_the_background(self):
+        self.assertEqual([s.label for s in suggest.suggest("home")], [self.home.title])
+
+        Page.objects.filter(pk=self.home.pk).update(title="Frontpage")
+        bump_now(suggest.SUGGEST_TAG)
+        with mock.patch.object(suggest, "_start_rebuild") as start_rebuild:
+            # The old index answers while the rebuild runs.
+            self.assertEqual([s.label for s in suggest.suggest("home")], [self.home.title])
+            suggest.suggest("home")
+        start_rebuild.assert_called_once()
+
+        with mock.patch.object(suggest.connections, "close_all"):
+            suggest._rebuild(*start_rebuild.call_args.args)
+        self.assertEqual(suggest.suggest("home"), [])
+        self.assertEqual([s.label for s in suggest.suggest("front")], ["Frontpage"])
+
+
+class SearchResultsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+
+    def add_post(self, title):
+        post = self.listing.add_child(
+            instance=ArticleBlogPage(title=title, slug=slugify(title), custom_title=title, live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        return post
+
+    def test_query_is_normalized(self):
+        self.assertEqual(results.normalize_query("  Hello \n  World "), "Hello World")
+        self.assertEqual(len(results.normalize_query("x" * 500)), results.MAX_QUERY_LENGTH)
+
+    def test_results_are_cached_per_query_until_content_changes(self):
+        post = self.add_post("Wagtail")
+        with mock.patch.object(results, "_run_search", wraps=results._run_search) as run_search:
+            self.assertEqual(results.search_page_ids("Wagtail"), [post.pk])
+            # Casing doesn't make a separate entry.
+            self.assertEqual(results.search_page_ids("WAGTAIL"), [post.pk])
+            self.assertEqual(run_search.call_count, 1)
+
+            other = self.add_post("Wagtail news")
+            self.assertEqual(sorted(results.search_page_ids("wagtail")), sorted([post.pk, other.pk]))
+            self.assertEqual(run_search.call_count, 2)
+
+    @override_settings(SEARCH_RESULTS_PER_PAGE=1)
+    def test_view_pages_through_cached_ids(self):
+        posts = [self.add_post(title) for title in ("Wagtail", "Wagtail news")]
+        with mock.patch.object(results, "_run_search", return_value=[p.pk for p in posts]):
+            first = self.client.get("/search/", {"query": "wagtail"}).context["search_results"]
+            second = self.client.get("/search/", {"query": "wagtail", "page": 2}).context["search_results"]
+        self.assertEqual([page.pk for page in first], [posts[0].pk])
+        self.assertEqual([page.pk for page in second], [posts[1].pk])
+        self.assertEqual(second[0].listing_url, "/blog/wagtail-news/")
@@ -1,30 +1,48 @@
+from django.conf import settings
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
 
-from wagtail.models import Page
-from wagtail.search.backends import get_search_backend
+from . import suggest as suggest_index
+from .results import MAX_QUERY_LENGTH, load_results, normalize_query, search_page_ids
 
 def search(request):
-    search_query = request.GET.get('query', None)
+    search_query = normalize_query(request.GET.get('query'))
     page = request.GET.get('page', 1)
 
     # Search
     if search_query:
-        search_backend = get_search_backend()
-        search_results = search_backend.search(search_query, Page.objects.live())
+        result_ids = search_page_ids(search_query)
     else:
-        search_results = Page.objects.none()
+        result_ids = []
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
+    # Pagination over the cached IDs; only the shown pages are loaded.
+    paginator = Paginator(result_ids, getattr(settings, 'SEARCH_RESULTS_PER_PAGE', 10))
     try:
         search_results = paginator.page(page)
     except PageNotAnInteger:
         search_results = paginator.page(1)
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
+    search_results.object_list = load_results(search_results.object_list, request)
 
     return render(request, 'search/search.html', {
         'search_query': search_query,
         'search_results': search_results,
+        'results_capped': len(result_ids) >= getattr(settings, 'SEARCH_MAX_RESULTS', 200),
     })
+
+
+def suggest(request):
+    """JSON suggestions for search-as-you-type, served from memory."""
+    try:
+        limit = min(int(request.GET.get('limit', 8)), 20)
+    except ValueError:
+        limit = 8
+    suggestions = suggest_index.suggest(request.GET.get('q', '')[:MAX_QUERY_LENGTH], limit)
+    response = JsonResponse({
+        'suggestions': [suggestion._asdict() for suggestion in suggestions],
+    })
+    patch_cache_control(response, public=True, max_age=60)
+    return response
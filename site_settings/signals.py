@@ -0,0 +1,14 @@
+"""Invalidate cached pages when a site's settings change."""
+from django.db.models.signals import post_save
+
+from core.cache import bump
+
+from .models import SocialMediaSettings
+
+
+def settings_changed(sender, instance, **kwargs):
+    bump(f"site_settings:{instance.site_id}", namespace="site_settings")
+
+
+def register_signal_handlers():
+    post_save.connect(settings_changed, sender=SocialMediaSettings)
@@ -0,0 +1,73 @@
+"""StreamField API representations computed once per live revision.
+
+``CachedStreamField`` replaces Wagtail's StreamField serializer in
+``api_fields``. The representation is stored in the cache under the page's
+live revision and the tags of the pages, images and documents the value
+references (see streams.render_cache), which core.signals bumps when they
+change. streams.signals precomputes it on publish and the
+``precompute_api_representations`` command backfills existing pages.
+"""
+from django.core.cache import cache
+from wagtail.api import APIField
+from wagtail.api.v2.serializers import StreamField as StreamFieldSerializer
+
+from core.cache import versioned_key
+
+from .render_cache import reference_tags
+
+API_REPRESENTATION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _cache_key(page, field_name):
+    value = getattr(page, field_name)
+    # Not the page's own tag: core.signals bumps it when the publish commits,
+    # which may be after streams.signals has stored the new representation.
+    tags = reference_tags(value.stream_block, value) if value else []
+    if tags is None:
+        tags = [f"page:{page.pk}"]
+    return versioned_key("stream_api", tags, page.pk, page.live_revision_id, field_name)
+
+
+def compute_representation(page, field_name, context=None):
+    value = getattr(page, field_name)
+    if not value:
+        return []
+    return value.stream_block.get_api_representation(value, context or {})
+
+
+def get_representation(page, field_name, context=None):
+    """Cached API representation of ``page.<field_name>``."""
+    if page.live_revision_id is None:
+        return compute_representation(page, field_name, context)
+    return cache.get_or_set(
+        _cache_key(page, field_name),
+        lambda: compute_representation(page, field_name, context),
+        API_REPRESENTATION_TIMEOUT,
+    )
+
+
+def cached_stream_fields(model):
+    """Names of the ``api_fields`` of ``model`` served by ``CachedStreamField``."""
+    return [
+        field.name
+        for field in getattr(model, "api_fields", ())
+        if isinstance(field, APIField) and isinstance(field.serializer, CachedStreamField)
+    ]
+
+
+def precompute(page):
+    """Store the representations of every cached stream field of ``page``."""
+    for field_name in cached_stream_fields(type(page)):
+        cache.set(
+            _cache_key(page, field_name),
+            compute_representation(page, field_name),
+            API_REPRESENTATION_TIMEOUT,
+        )
+
+
+class CachedStreamField(StreamFieldSerializer):
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, page):
+        return get_representation(page, self.source, self.context)
@@ -13,8 +13,12 @@ from wagtail.blocks import (
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.templatetags.wagtailcore_tags import richtext
 
+from core.page_urls import live_url
 
-class TitleAndTextBlock(StructBlock):
+from .render_cache import CachedRenderMixin
+
+
+class TitleAndTextBlock(CachedRenderMixin, StructBlock):
     """Title and text block."""
 
     title = CharBlock(required=True, help_text="Add your title")
@@ -22,11 +26,12 @@ class TitleAndTextBlock(StructBlock):
 
     class Meta:  # noqa
         template = "streams/title_and_text_block.html"
+        render_cache = True
         icon = "edit"
         label = "Title & Text"
 
 
-class CardBlock(StructBlock):
+class CardBlock(CachedRenderMixin, StructBlock):
     """Cards with an image, title, text, and optional button(s)."""
 
     title = CharBlock(required=True, help_text="Add your title")
@@ -50,11 +55,12 @@ class CardBlock(StructBlock):
 
     class Meta:  # noqa
         template = "streams/card_block.html"
+        render_cache = True
         icon = "placeholder"
         label = "Staff Cards"
 
 
-class RichtextBlock(RichTextBlock):
+class RichtextBlock(CachedRenderMixin, RichTextBlock):
     """Richtext block with all features."""
 
     def get_api_representation(self, value, context=None):
@@ -63,11 +69,12 @@ class RichtextBlock(RichTextBlock):
 
     class Meta:  # noqa
         template = "streams/richtext_block.html"
+        render_cache = True
         icon = "doc-full"
         label = "Full RichText"
 
 
-class SimpleRichtextBlock(RichTextBlock):
+class SimpleRichtextBlock(CachedRenderMixin, RichTextBlock):
     """Richtext block with limited features."""
 
     def __init__(self, **kwargs):
@@ -76,11 +83,12 @@ class SimpleRichtextBlock(RichTextBlock):
 
     class Meta:  # noqa
         template = "streams/richtext_block.html"
+        render_cache = True
         icon = "edit"
         label = "Simple RichText"
 
 
-class CTABlock(StructBlock):
+class CTABlock(CachedRenderMixin, StructBlock):
     """Call-to-action block."""
 
     title = CharBlock(required=True, max_length=60)
@@ -91,6 +99,7 @@ class CTABlock(StructBlock):
 
     class Meta:  # noqa
         template = "streams/cta_block.html"
+        render_cache = True
         icon = "placeholder"
         label = "Call to Action"
 
@@ -102,14 +111,15 @@ class LinkStructValue(StructValue):
         """Determine the URL to use based on available fields."""
         button_page = self.get('button_page')
         button_url = self.get('button_url')
-        if button_page:
-            return button_page.url
+        url = live_url(button_page) if button_page else None
+        if url:
+            return url
         if button_url:
             return button_url
         return None
 
 
-class ButtonBlock(StructBlock):
+class ButtonBlock(CachedRenderMixin, StructBlock):
     """A block for a single button with an external or internal URL."""
 
     button_page = PageChooserBlock(
@@ -123,6 +133,7 @@ class ButtonBlock(StructBlock):
 
     class Meta:  # noqa
         template = "streams/button_block.html"
+        render_cache = True
         icon = "placeholder"
         label = "Single Button"
         value_class = LinkStructValue
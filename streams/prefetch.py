@@ -0,0 +1,257 @@
+"""Batch loading of objects referenced from StreamField values.
+
+Wagtail resolves chooser blocks one stream at a time, so rendering a list of
+pages issues a query per page and field. The helpers here walk the raw data
+of many stream values, collect every referenced ID (including those nested
+in struct, list and stream blocks), fetch them with one query per model and
+build the native block values from the results.
+
+Chosen pages are loaded as specific pages (with only their base columns)
+and get a ``resolved_url`` from the page URL index, ``None`` unless they
+are live (see ``core.page_urls.live_url`` and the ``page_url`` filter).
+"""
+from collections import defaultdict
+
+from wagtail.blocks import ChooserBlock, ListBlock, StreamValue, StructBlock
+from wagtail.blocks.list_block import ListValue
+from wagtail.blocks.stream_block import BaseStreamBlock
+from wagtail.images import get_image_model
+from wagtail.images.models import AbstractImage
+from wagtail.models import Page
+
+from core.page_urls import resolve_urls
+
+
+def _child_blocks(block):
+    if isinstance(block, (StructBlock, BaseStreamBlock)):
+        return block.child_blocks.values()
+    if isinstance(block, ListBlock):
+        return [block.child_block]
+    return []
+
+
+_has_references_cache = {}
+
+
+def _has_references(block):
+    """Whether ``block`` or any of its descendants is a chooser block."""
+    # Block definitions live for the whole process, so their ids are stable keys.
+    if id(block) not in _has_references_cache:
+        _has_references_cache[id(block)] = isinstance(block, ChooserBlock) or any(
+            _has_references(child) for child in _child_blocks(block)
+        )
+    return _has_references_cache[id(block)]
+
+
+def _list_items(block, raw):
+    """Yield ``(value, id)`` for the items of a raw ListBlock value."""
+    for item in raw or []:
+        if block._item_is_in_block_format(item):
+            yield item["value"], item["id"]
+        else:
+            yield item, None
+
+
+def _collect(block, raw, ids):
+    if raw is None:
+        return
+    if isinstance(block, ChooserBlock):
+        ids[block.model_class].add(raw)
+    elif isinstance(block, StructBlock):
+        for name, child in block.child_blocks.items():
+            if name in raw:
+                _collect(child, raw[name], ids)
+    elif isinstance(block, ListBlock):
+        for value, _ in _list_items(block, raw):
+            _collect(block.child_block, value, ids)
+    elif isinstance(block, BaseStreamBlock):
+        for item in raw:
+            child = block.child_blocks.get(item["type"])
+            if child is not None:
+                _collect(child, item["value"], ids)
+
+
+def _to_python(block, raw, objects):
+    """Like ``block.to_python(raw)``, but resolving references from ``objects``."""
+    if isinstance(block, ChooserBlock):
+        return None if raw is None else objects[block.model_class].get(raw)
+    if not _has_references(block):
+        return block.to_python(raw)
+    if isinstance(block, StructBlock):
+        return block._to_struct_value(
+            [
+                (
+                    name,
+                    _to_python(child, raw[name], objects)
+                    if name in raw
+                    else child.get_default(),
+                )
+                for name, child in block.child_blocks.items()
+            ]
+        )
+    if isinstance(block, ListBlock):
+        return ListValue(
+            block,
+            bound_blocks=[
+                ListValue.ListChild(
+                    block.child_block,
+                    _to_python(block.child_block, value, objects),
+                    id=item_id,
+                )
+                for value, item_id in _list_items(block, raw)
+            ],
+        )
+    if isinstance(block, BaseStreamBlock):
+        return StreamValue(
+            block,
+            [
+                (
+                    item["type"],
+                    _to_python(block.child_blocks[item["type"]], item["value"], objects),
+                    item.get("id"),
+                )
+                for item in raw
+                if item["type"] in block.child_blocks
+            ],
+        )
+    return block.to_python(raw)
+
+
+def _remap(block, raw, mapping, unmapped):
+    if raw is None or not _has_references(block):
+        return raw
+    if isinstance(block, ChooserBlock):
+        model_mapping = mapping.get(block.model_class, {})
+        if raw in model_mapping or unmapped is None or block.model_class not in mapping:
+            return model_mapping.get(raw, raw)
+        unmapped[block.model_class].add(raw)
+        return None
+    if isinstance(block, StructBlock):
+        return {
+            name: _remap(block.child_blocks[name], value, mapping, unmapped)
+            if name in block.child_blocks
+            else value
+            for name, value in raw.items()
+        }
+    if isinstance(block, ListBlock):
+        return [
+            {**item, "value": _remap(block.child_block, item["value"], mapping, unmapped)}
+            if block._item_is_in_block_format(item)
+            else _remap(block.child_block, item, mapping, unmapped)
+            for item in raw
+        ]
+    if isinstance(block, BaseStreamBlock):
+        items = []
+        for item in raw:
+            child = block.child_blocks.get(item["type"])
+            value = item["value"] if child is None else _remap(child, item["value"], mapping, unmapped)
+            # A child that was nothing but a cleared reference goes too.
+            if value is None and item["value"] is not None and isinstance(child, ChooserBlock):
+                continue
+            items.append({**item, "value": value})
+        return items
+    return raw
+
+
+def remap_references(stream_block, raw_data, mapping, unmapped=None):
+    """Return a copy of ``raw_data`` with chooser IDs replaced.
+
+    ``mapping`` is ``{model: {old_pk: new_pk}}``; IDs it doesn't mention
+    are kept. With ``unmapped`` (a ``defaultdict(set)``), IDs of a model in
+    ``mapping`` that it has no entry for are cleared instead and added to
+    ``unmapped[model]``; stream children holding only such a chooser are
+    dropped.
+    """
+    return _remap(stream_block, list(raw_data or []), mapping, unmapped)
+
+
+def fetch_objects(ids, rendition_specs=(), request=None):
+    """Fetch ``{model: {pk: instance}}`` for ``{model: set_of_pks}``.
+
+    Images come with their existing renditions for ``rendition_specs``
+    prefetched, so ``{% image %}`` finds them without a query. Pages are
+    specific and carry ``resolved_url``, resolved for all of them at once.
+    """
+    objects = {}
+    for model, pks in ids.items():
+        queryset = model.objects.filter(pk__in=pks)
+        if rendition_specs and issubclass(model, AbstractImage):
+            queryset = queryset.prefetch_renditions(*rendition_specs)
+        if issubclass(model, Page):
+            queryset = queryset.specific(defer=True)
+        objects[model] = {obj.pk: obj for obj in queryset}
+        if issubclass(model, Page):
+            urls = resolve_urls(list(objects[model]), request, live_only=True)
+            for pk, page in objects[model].items():
+                page.resolved_url = urls[pk]
+    return objects
+
+
+def collect_references(stream_values):
+    """Return ``{model: set_of_pks}`` for everything the stream values reference."""
+    ids = defaultdict(set)
+    for stream_value in stream_values:
+        if not isinstance(stream_value, StreamValue):
+            continue
+        for raw in stream_value.raw_data:
+            block = stream_value.stream_block.child_blocks.get(raw["type"])
+            if block is not None and _has_references(block):
+                _collect(block, raw["value"], ids)
+    return ids
+
+
+def prefetch_stream_values(stream_values, rendition_specs=(), request=None):
+    """Resolve every reference in many stream values with one query per model.
+
+    Only top-level blocks that haven't been accessed yet and that contain a
+    chooser block somewhere are converted; everything else is left lazy.
+    Returns the fetched ``{model: {pk: instance}}`` mapping.
+    """
+    pending = []
+    ids = defaultdict(set)
+    for stream_value in stream_values:
+        if not isinstance(stream_value, StreamValue):
+            continue
+        for i, raw in enumerate(stream_value._raw_data):
+            if raw is None or stream_value._bound_blocks[i] is not None:
+                continue
+            block = stream_value.stream_block.child_blocks.get(raw["type"])
+            if block is not None and _has_references(block):
+                _collect(block, raw["value"], ids)
+                pending.append((stream_value, i, block, raw))
+
+    objects = fetch_objects(ids, rendition_specs, request)
+    objects = defaultdict(dict, objects)
+    for stream_value, i, block, raw in pending:
+        stream_value._bound_blocks[i] = StreamValue.StreamChild(
+            block, _to_python(block, raw["value"], objects), id=raw.get("id")
+        )
+    return objects
+
+
+class StreamPrefetchMixin:
+    """Page mixin that resolves StreamField references before rendering.
+
+    List the StreamFields in ``prefetch_stream_fields`` and the filter specs
+    the page's templates use in ``prefetch_rendition_specs``.
+    """
+
+    prefetch_stream_fields = ()
+    prefetch_rendition_specs = ()
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        prefetch_stream_values(
+            self._prefetch_stream_values(), self.prefetch_rendition_specs, request
+        )
+        return context
+
+    def _prefetch_stream_values(self):
+        return [getattr(self, name, None) for name in self.prefetch_stream_fields]
+
+    def get_rendition_requests(self):
+        """Yield ``(image_id, filter_spec)`` for every rendition the page renders."""
+        image_ids = collect_references(self._prefetch_stream_values())[get_image_model()]
+        for image_id in image_ids:
+            for spec in self.prefetch_rendition_specs:
+                yield image_id, spec
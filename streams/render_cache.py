@@ -0,0 +1,98 @@
+"""Cache the rendered HTML of individual StreamField blocks.
+
+Blocks opt in with ``render_cache = True`` in their ``Meta`` and mix in
+``CachedRenderMixin``. The key combines the block type, a hash of the
+block's value and the revision of the page being rendered. It also carries
+the cache tags (see :mod:`core.cache`) of every page, image and document
+the value references, including links in rich text. core.signals bumps
+those tags, so a change to a button's target page re-renders only the
+blocks that point at it. Blocks that reference a page also carry the URL
+index tag: moving or renaming one of the page's ancestors changes its URL
+without saving the page itself.
+
+Block templates contain ``{% csrf_token %}``. Rendering for the cache uses
+a placeholder token that is swapped for the visitor's own on every hit.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.safestring import mark_safe
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+from core.cache import stats, versioned_key
+from core.page_urls import INDEX_TAG
+
+NAMESPACE = "block_render"
+# Bump this tag to drop every cached block, e.g. after a template change.
+RENDER_CACHE_TAG = "block_render"
+CSRF_PLACEHOLDER = "__block_render_csrf_token__"
+
+
+def reference_tags(block, value):
+    """Cache tags of the objects ``value`` references, or ``None`` if unknown."""
+    tags = set()
+    for model, pk, _, _ in block.extract_references(value):
+        if issubclass(model, Page):
+            tags.update([f"page:{pk}", INDEX_TAG])
+        elif issubclass(model, get_image_model()):
+            tags.add(f"image:{pk}")
+        elif issubclass(model, get_document_model()):
+            tags.add(f"document:{pk}")
+        else:
+            # Nothing would tell us when it changes.
+            return None
+    return sorted(tags)
+
+
+def value_digest(block, value):
+    prep_value = block.get_prep_value(value)
+    return hashlib.md5(
+        json.dumps(prep_value, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def render_cache_enabled(context):
+    if not getattr(settings, "BLOCK_RENDER_CACHE", True) or context is None:
+        return False
+    # Previews render unsaved content.
+    return not getattr(context.get("request"), "is_preview", False)
+
+
+class CachedRenderMixin:
+    """Serve ``render()`` from the cache for blocks with ``Meta.render_cache``."""
+
+    def render_cache_key(self, value, context):
+        tags = reference_tags(self, value)
+        if tags is None:
+            return None
+        page = context.get("page")
+        return versioned_key(
+            "block_render",
+            [RENDER_CACHE_TAG, *tags],
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            getattr(self.meta, "template", ""),
+            value_digest(self, value),
+            getattr(page, "live_revision_id", None),
+        )
+
+    def render(self, value, context=None):
+        if not getattr(self.meta, "render_cache", False) or not render_cache_enabled(context):
+            return super().render(value, context)
+        key = self.render_cache_key(value, context)
+        if key is None:
+            return super().render(value, context)
+
+        html = cache.get(key)
+        if html is None:
+            stats.record(NAMESPACE, "misses")
+            html = str(super().render(value, dict(context, csrf_token=CSRF_PLACEHOLDER)))
+            cache.set(key, html, getattr(settings, "BLOCK_RENDER_CACHE_TIMEOUT", 60 * 60 * 24))
+        else:
+            stats.record(NAMESPACE, "hits")
+        token = context.get("csrf_token")
+        return mark_safe(html.replace(CSRF_PLACEHOLDER, str(token) if token else ""))
@@ -0,0 +1,105 @@
+"""Plain-text search documents built from StreamField content.
+
+``stream_text`` walks the raw JSON of a StreamField alongside its block
+definitions, so no chooser lookups or block values are built. Chooser and URL
+blocks contribute nothing; rich text is stripped of markup in a single
+``HTMLParser`` pass.
+
+Pages using ``SearchDocumentMixin`` index ``search_document`` instead of the
+StreamFields themselves. The document is cached per live revision, so saving
+or reindexing a page whose content hasn't changed doesn't walk it again.
+"""
+from html.parser import HTMLParser
+
+from django.core.cache import cache
+from wagtail import blocks
+
+SEARCH_DOCUMENT_TIMEOUT = 60 * 60 * 24 * 30
+
+# Block types whose raw value is a string worth indexing.
+TEXT_BLOCKS = (blocks.CharBlock, blocks.TextBlock)
+SKIPPED_BLOCKS = (blocks.ChooserBlock, blocks.URLBlock, blocks.EmailBlock)
+
+
+class _TextExtractor(HTMLParser):
+    # Tags that end a run of text; keep words on either side apart.
+    BREAKS = {"p", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "div", "blockquote", "td"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BREAKS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self.BREAKS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def strip_html(html):
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return " ".join("".join(parser.parts).split())
+
+
+def block_text(block, raw):
+    """Yield the text of one raw block value."""
+    if raw is None or isinstance(block, SKIPPED_BLOCKS):
+        return
+    if isinstance(block, blocks.RichTextBlock):
+        text = strip_html(raw)
+        if text:
+            yield text
+    elif isinstance(block, TEXT_BLOCKS):
+        if raw:
+            yield raw
+    elif isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield from block_text(child_block, raw.get(name))
+    elif isinstance(block, blocks.ListBlock):
+        for item in raw:
+            # ListBlock items are {"type": "item", "value": ...} since Wagtail 2.16.
+            if isinstance(item, dict) and item.get("type") == "item" and "value" in item:
+                item = item["value"]
+            yield from block_text(block.child_block, item)
+    elif isinstance(block, blocks.BaseStreamBlock):
+        yield from stream_block_text(block, raw)
+
+
+def stream_block_text(stream_block, raw_data):
+    for item in raw_data or ():
+        child_block = stream_block.child_blocks.get(item.get("type"))
+        if child_block is not None:
+            yield from block_text(child_block, item.get("value"))
+
+
+def stream_text(stream_value):
+    """Yield the text of every block in a ``StreamValue``."""
+    if stream_value:
+        yield from stream_block_text(stream_value.stream_block, stream_value.raw_data)
+
+
+class SearchDocumentMixin:
+    """Index the text of ``search_stream_fields`` as ``search_document``."""
+
+    search_stream_fields = []
+
+    def build_search_document(self):
+        return "\n".join(
+            text
+            for field_name in self.search_stream_fields
+            for text in stream_text(getattr(self, field_name))
+        )
+
+    def search_document(self):
+        revision_id = self.live_revision_id
+        if revision_id is None:
+            return self.build_search_document()
+        key = f"search_document:{self.pk}:{revision_id}"
+        return cache.get_or_set(key, self.build_search_document, SEARCH_DOCUMENT_TIMEOUT)
@@ -0,0 +1,25 @@
+"""Precompute StreamField API representations when pages are published."""
+from django.db import transaction
+from wagtail.signals import page_published
+
+from core.page_tree import pages_published
+
+from .api import precompute
+
+
+def page_published_handler(sender, instance, **kwargs):
+    # After commit, so the tags of what the page references are up to date.
+    transaction.on_commit(lambda: precompute(instance))
+
+
+def pages_published_handler(sender, instances, **kwargs):
+    def precompute_all():
+        for page in instances:
+            precompute(page)
+
+    transaction.on_commit(precompute_all)
+
+
+def register_signal_handlers():
+    page_published.connect(page_published_handler)
+    pages_published.connect(pages_published_handler)
@@ -1,3 +1,338 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail import blocks
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+
+from blog.models import ArticleBlogPage, BlogListingPage
+from core.cache import bump_now
+from core.templatetags.core_tags import page_url
+from flex.models import FlexPage
+
+from . import api
+from .blocks import ButtonBlock
+from .prefetch import prefetch_stream_values
+from .render_cache import RENDER_CACHE_TAG, CachedRenderMixin
+from .search import strip_html
+
+
+def use_temp_media(test):
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    media = override_settings(MEDIA_ROOT=directory)
+    media.enable()
+    test.addCleanup(media.disable)
+
+
+class ImagePrefetchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_media(self)
+        listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        Image = get_image_model()
+        self.images = [
+            Image.objects.create(title=f"Image {i}", file=get_test_image_file(f"image-{i}.png"))
+            for i in range(3)
+        ]
+        for i, image in enumerate(self.images):
+            listing.add_child(
+                instance=ArticleBlogPage(
+                    title=f"Post {i}",
+                    slug=f"post-{i}",
+                    custom_title=f"Post {i}",
+                    banner_image=[("image", image)],
+                    content=[("image", self.images[0]), ("full_richtext", "<p>Text</p>")],
+                )
+            )
+            image.get_rendition("fill-250x250")
+
+    def load_posts(self):
+        posts = list(ArticleBlogPage.objects.order_by("pk"))
+        return posts, [value for post in posts for value in (post.banner_image, post.content)]
+
+    def test_images_are_fetched_with_one_query(self):
+        posts, values = self.load_posts()
+        with self.assertNumQueries(1):
+            prefetch_stream_values(values)
+        with self.assertNumQueries(0):
+            banners = [post.banner_image[0].value for post in posts]
+            contents = [post.content[0].value for post in posts]
+        self.assertEqual(banners, self.images)
+        self.assertEqual(contents, [self.images[0]] * 3)
+        # One instance per image, shared between streams.
+        self.assertIs(contents[0], contents[1])
+
+    def test_existing_renditions_are_prefetched(self):
+        posts, values = self.load_posts()
+        with self.assertNumQueries(2):
+            prefetch_stream_values(values, ["fill-250x250"])
+        with self.assertNumQueries(0):
+            for post in posts:
+                post.banner_image[0].value.get_rendition("fill-250x250")
+
+
+class TokenBlock(CachedRenderMixin, blocks.CharBlock):
+    """Renders its value and the visitor's CSRF token, counting renders."""
+
+    renders = 0
+
+    class Meta:
+        render_cache = True
+
+    def render_basic(self, value, context=None):
+        type(self).renders += 1
+        return f"{value}:{context['csrf_token']}"
+
+
+class BlockRenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        TokenBlock.renders = 0
+        self.block = TokenBlock()
+        self.page = Page.objects.get(depth=2)
+
+    def render(self, token="token", **request_attrs):
+        request = RequestFactory().get("/")
+        for name, value in request_attrs.items():
+            setattr(request, name, value)
+        context = {"page": self.page, "request": request, "csrf_token": token}
+        return self.block.render("value", context)
+
+    def test_hits_are_not_rendered_again(self):
+        self.assertEqual(self.render(), "value:token")
+        self.assertEqual(self.render(), "value:token")
+        self.assertEqual(TokenBlock.renders, 1)
+
+    def test_each_visitor_gets_their_own_csrf_token(self):
+        self.assertEqual(self.render("first"), "value:first")
+        self.assertEqual(self.render("second"), "value:second")
+        self.assertEqual(TokenBlock.renders, 1)
+
+    def test_previews_are_not_cached(self):
+        self.render(is_preview=True)
+        self.render(is_preview=True)
+        self.assertEqual(TokenBlock.renders, 2)
+
+    @override_settings(BLOCK_RENDER_CACHE=False)
+    def test_cache_can_be_turned_off(self):
+        self.render()
+        self.render()
+        self.assertEqual(TokenBlock.renders, 2)
+
+    def test_bumping_the_render_tag_drops_every_block(self):
+        self.render()
+        bump_now(RENDER_CACHE_TAG)
+        self.render()
+        self.assertEqual(TokenBlock.renders, 2)
+
+
+class BlockRenderCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        # Not a post, so only the URL index tag tells the block it moved.
+        self.archive = self.listing.add_child(
+            instance=BlogListingPage(title="Archive", slug="archive", custom_title="Archive")
+        )
+        self.post = self.listing.add_child(
+            instance=ArticleBlogPage(title="Post", slug="post", custom_title="Post", live=False)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for page in (self.listing, self.archive, self.post):
+                page.save_revision().publish()
+
+    def button_key(self):
+        # Rendering needs the subscribe route, which isn't wired up.
+        block = ButtonBlock()
+        value = block.to_python({"button_page": self.archive.pk, "button_url": ""})
+        return block.render_cache_key(value, {"page": self.post})
+
+    def test_renaming_an_ancestor_of_a_linked_page_changes_the_key(self):
+        key = self.button_key()
+        self.assertEqual(self.button_key(), key)
+
+        listing = Page.objects.get(pk=self.listing.pk).specific
+        listing.slug = "news"
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save_revision().publish()
+
+        self.assertNotEqual(self.button_key(), key)
+
+
+class SearchDocumentTests(TestCase):
+    content = [
+        {"type": "title_and_text", "value": {"title": "Opening", "text": "First words"}},
+        {"type": "full_richtext", "value": "<p>Rich <b>text</b></p><p>here &amp; there</p>"},
+        {
+            "type": "cards",
+            "value": {
+                "title": "Team",
+                "cards": [
+                    {
+                        "type": "item",
+                        "value": {
+                            "image": 1,
+                            "title": "Ann",
+                            "text": "Editor",
+                            "button_page": 2,
+                            "button_url": "https://example.com/ann",
+                        },
+                    }
+                ],
+            },
+        },
+        {
+            "type": "cta",
+            "value": {
+                "title": "Join",
+                "text": "<p>Sign up</p>",
+                "button_page": None,
+                "button_url": "https://example.com/join",
+                "button_text": "Go",
+            },
+        },
+    ]
+
+    def test_strip_html_keeps_words_apart(self):
+        self.assertEqual(strip_html("<p>Hello <b>big</b></p><p>world&amp;co</p>"), "Hello big world&co")
+
+    def test_document_holds_the_text_of_every_block(self):
+        page = FlexPage(title="Flex", content=self.content)
+        self.assertEqual(
+            page.build_search_document().split("\n"),
+            ["Opening", "First words", "Rich text here & there", "Team", "Ann", "Editor",
+             "Join", "Sign up", "Go"],
+        )
+
+    def test_document_is_cached_per_live_revision(self):
+        page = FlexPage(title="Flex", content=self.content)
+        page.pk, page.live_revision_id = 1, 1
+        with mock.patch.object(
+            FlexPage, "build_search_document", autospec=True, return_value="text"
+        ) as build:
+            page.search_document()
+            page.search_document()
+            page.live_revision_id = 2
+            page.search_document()
+        self.assertEqual(build.call_count, 2)
+
+    def test_stream_text_is_searchable(self):
+        cache.clear()
+        listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        post = listing.add_child(
+            instance=ArticleBlogPage(
+                title="Post",
+                slug="post",
+                custom_title="Post",
+                content=[("full_richtext", "<p>Zebras everywhere</p>")],
+            )
+        )
+        results = get_search_backend().search("zebras", ArticleBlogPage.objects.live())
+        self.assertEqual([page.pk for page in results], [post.pk])
+
+
+class APIRepresentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        listing = Page.objects.get(depth=2).add_child(
+            instance=BlogListingPage(title="Blog", slug="blog", custom_title="Blog")
+        )
+        self.post = listing.add_child(
+            instance=ArticleBlogPage(
+                title="Post",
+                slug="post",
+                custom_title="Post",
+                live=False,
+                content=[("full_richtext", "<p>First</p>")],
+            )
+        )
+
+    def publish(self, text):
+        post = ArticleBlogPage.objects.get(pk=self.post.pk)
+        post.content = [("full_richtext", text)]
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        return ArticleBlogPage.objects.get(pk=self.post.pk)
+
+    def representation(self, post):
+        with mock.patch.object(api, "compute_representation", wraps=api.compute_representation) as compute:
+            data = api.get_representation(post, "content")
+        return data, compute.call_count
+
+    def test_publishing_precomputes_the_representation(self):
+        post = self.publish("<p>Second</p>")
+        data, computed = self.representation(post)
+        self.assertEqual(computed, 0)
+        self.assertEqual([block["value"] for block in data], ["<p>Second</p>"])
+
+    def test_each_revision_has_its_own_representation(self):
+        self.publish("<p>Second</p>")
+        post = self.publish("<p>Third</p>")
+        data, computed = self.representation(post)
+        self.assertEqual(computed, 0)
+        self.assertEqual([block["value"] for block in data], ["<p>Third</p>"])
+
+    def test_pages_without_a_live_revision_are_not_cached(self):
+        post = ArticleBlogPage.objects.get(pk=self.post.pk)
+        self.assertEqual(self.representation(post)[1], 1)
+        self.assertEqual(self.representation(post)[1], 1)
+
+
+class PageChooserPrefetchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_media(self)
+        home = Page.objects.get(depth=2)
+        self.targets = [
+            home.add_child(instance=FlexPage(title=f"Target {i}", slug=f"target-{i}"))
+            for i in range(3)
+        ]
+        self.draft = home.add_child(instance=FlexPage(title="Draft", slug="draft", live=False))
+        image = get_image_model().objects.create(title="Image", file=get_test_image_file())
+        cards = [
+            {"image": image.pk, "title": f"Card {i}", "text": "Text", "button_page": page.pk, "button_url": ""}
+            for i, page in enumerate([*self.targets, self.draft])
+        ]
+        self.page = home.add_child(
+            instance=FlexPage(
+                title="Flex",
+                slug="flex",
+                content=[
+                    {"type": "cards", "value": {"title": "Cards", "cards": cards}},
+                    {"type": "button", "value": {"button_page": self.targets[0].pk, "button_url": ""}},
+                    {"type": "cta", "value": {
+                        "title": "CTA", "text": "<p>Go</p>", "button_page": self.targets[1].pk,
+                        "button_url": "", "button_text": "Go",
+                    }},
+                ],
+            )
+        )
+
+    def test_chosen_pages_and_urls_are_resolved_together(self):
+        page = FlexPage.objects.get(pk=self.page.pk)
+        # Warm the URL index so the count doesn't depend on cache state.
+        prefetch_stream_values([FlexPage.objects.get(pk=self.page.pk).content])
+        # Images, then pages with their specific rows deferred.
+        with self.assertNumQueries(2):
+            prefetch_stream_values([page.content])
+        with self.assertNumQueries(0):
+            cards, button, cta = [block.value for block in page.content]
+            card_urls = [card["button_page"].resolved_url for card in cards["cards"]]
+            button_url = button.url()
+            cta_url = page_url(cta["button_page"])
+        self.assertEqual(card_urls, ["/target-0/", "/target-1/", "/target-2/", None])
+        self.assertEqual(button_url, "/target-0/")
+        self.assertEqual(cta_url, "/target-1/")
+        self.assertIs(cards["cards"][0]["button_page"], button.get("button_page"))
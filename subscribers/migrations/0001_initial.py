@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscribers',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(help_text='Email address', max_length=100)),
+                ('full_name', models.CharField(help_text='First and last name', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Subscriber',
+                'verbose_name_plural': 'Subscribers',
+            },
+        ),
+    ]